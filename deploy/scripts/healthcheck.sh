@@ -11,29 +11,35 @@ import sys
 
 root = os.environ["ROOT_DIR"]
 sys.path.append(os.path.join(root, "services-py", "common", "gen"))
+sys.path.append(os.path.join(root, "services-py"))
 
-import grpc
 import assistant_pb2
 import assistant_pb2_grpc
+from common.grpc_server import insecure_channel, target_for
+from common.models import ServiceConfig
 
+# Addresses follow the same env vars as the services: `<PREFIX>_UDS` or
+# `GRPC_UDS_DIR` selects the Unix socket, otherwise `<PREFIX>_HOST`/`_PORT`.
 services = [
-    ("ax8850", "127.0.0.1:50051", assistant_pb2_grpc.Ax8850ServiceStub),
-    ("vision", "127.0.0.1:50052", assistant_pb2_grpc.VisionServiceStub),
-    ("camera", "127.0.0.1:50053", assistant_pb2_grpc.CameraServiceStub),
-    ("tts", "127.0.0.1:50054", assistant_pb2_grpc.TtsServiceStub),
+    ("ax8850", ServiceConfig.from_env("AX8850", 50051), assistant_pb2_grpc.Ax8850ServiceStub),
+    ("vision", ServiceConfig.from_env("VISION", 50052), assistant_pb2_grpc.VisionServiceStub),
+    ("camera", ServiceConfig.from_env("CAMERA", 50053), assistant_pb2_grpc.CameraServiceStub),
+    ("tts", ServiceConfig.from_env("TTS", 50054), assistant_pb2_grpc.TtsServiceStub),
+    ("retrieval", ServiceConfig.from_env("RETRIEVAL", 50055), assistant_pb2_grpc.RetrievalServiceStub),
 ]
 
 failed = False
-for name, addr, stub_cls in services:
+for name, config, stub_cls in services:
+    addr = target_for(config)
     try:
-        channel = grpc.insecure_channel(addr)
+        channel = insecure_channel(config)
         stub = stub_cls(channel)
-        res = stub.Health(assistant_pb2.HealthRequest())
-        print(f"{name}: ok={res.ok} message={res.message}")
+        res = stub.Health(assistant_pb2.HealthRequest(), timeout=5)
+        print(f"{name} ({addr}): ok={res.ok} message={res.message}")
         if not res.ok:
             failed = True
     except Exception as exc:
-        print(f"{name}: error {exc}")
+        print(f"{name} ({addr}): error {exc}")
         failed = True
 
 if failed:
@@ -29,8 +29,23 @@ AX8850_PORT=50051
 VISION_PORT=50052
 CAMERA_PORT=50053
 TTS_PORT=50054
+RETRIEVAL_PORT=50055
 EOF'
 fi
 
+# retrieval.service needs an index; build it the way run_mock.sh/run_device.sh do.
+set -a
+. /etc/default/assistant
+set +a
+if [ "${DEVICE_MODE:-0}" = "1" ]; then
+  sudo python3 -m pip install -r "$TARGET_DIR/services-py/requirements-device.txt"
+fi
+RAG_INDEX="${RETRIEVAL_INDEX_PATH:-$TARGET_DIR/docs/rag/index}"
+if [ ! -f "$RAG_INDEX/header.json" ]; then
+  sudo env DEVICE_MODE="${DEVICE_MODE:-0}" \
+    PYTHONPATH="$TARGET_DIR/services-py:$TARGET_DIR/services-py/common/gen" \
+    python3 -m retrieval_service.convert --json "$TARGET_DIR/docs/rag/moe_samples.json" --out "$RAG_INDEX"
+fi
+
 sudo systemctl daemon-reload
-sudo systemctl enable --now ax8850.service hailo_vision.service camera.service tts.service orchestrator.service
+sudo systemctl enable --now ax8850.service hailo_vision.service camera.service tts.service retrieval.service orchestrator.service
@@ -7,10 +7,16 @@ export PYTHONPATH="$ROOT_DIR/services-py:$ROOT_DIR/services-py/common/gen"
 
 pids=()
 
+RAG_INDEX="${RETRIEVAL_INDEX_PATH:-$ROOT_DIR/docs/rag/index}"
+if [ ! -f "$RAG_INDEX/header.json" ]; then
+  python3 -m retrieval_service.convert --json "$ROOT_DIR/docs/rag/moe_samples.json" --out "$RAG_INDEX"
+fi
+
 python3 "$ROOT_DIR/services-py/ax8850_service/server.py" & pids+=($!)
 python3 "$ROOT_DIR/services-py/hailo_vision_service/server.py" & pids+=($!)
 python3 "$ROOT_DIR/services-py/camera_service/server.py" & pids+=($!)
 python3 "$ROOT_DIR/services-py/tts_service/server.py" & pids+=($!)
+python3 "$ROOT_DIR/services-py/retrieval_service/server.py" & pids+=($!)
 
 trap 'kill ${pids[*]} 2>/dev/null || true' EXIT
 
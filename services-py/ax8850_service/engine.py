@@ -2,6 +2,8 @@ from abc import ABC, abstractmethod
 from typing import Generator, Tuple
 import time
 
+from common.emulator import get_emulator
+
 
 class Ax8850Client(ABC):
     @abstractmethod
@@ -36,11 +38,49 @@ class MockAx8850Client(Ax8850Client):
     def generate_stream(self, prompt: str, max_tokens: int, temperature: float) -> Generator[str, None, None]:
         print(f"Mocking LLM stream for prompt: {prompt}")
         mock_response = "This is a mock response from the LLM."
-        for word in mock_response.split():
+        words = mock_response.split()
+        for word in words[:max_tokens] if max_tokens > 0 else words:
             yield word + " "
             time.sleep(0.1)
 
 
+def prompt_tokens(prompt: str) -> int:
+    """
+    Rough token count for a prompt (about 1.3 tokens per word).
+    """
+    return int(len(prompt.split()) * 1.3 + 0.5)
+
+
+class EmulatedAx8850Client(Ax8850Client):
+    """
+    Mock outputs with device-faithful timing (see common/emulator.py).
+
+    STT and LLM share one AX8850, so Transcribe waits behind a running
+    Generate. A Generate holds the device through prefill (priced per prompt
+    token) and every decode step.
+    """
+
+    def __init__(self):
+        self.emulator = get_emulator()
+
+    def transcribe_audio(self, pcm_s16le: bytes, sample_rate: int, channels: int) -> Tuple[str, str, float]:
+        audio_ms = len(pcm_s16le) / (2 * max(channels, 1) * max(sample_rate, 1)) * 1000.0
+        cost_ms = self.emulator.run("ax8850.transcribe", audio_ms)
+        return ("This is a mock transcription.", "en", cost_ms)
+
+    def generate_stream(self, prompt: str, max_tokens: int, temperature: float) -> Generator[str, None, None]:
+        words = "This is a mock response from the LLM.".split()
+        # Real replies stop at EOS; max_tokens only caps them.
+        count = int(self.emulator.defaults.get("generate_tokens", len(words)))
+        if max_tokens > 0:
+            count = min(count, max_tokens)
+        with self.emulator.device("ax8850.prefill"):
+            self.emulator.sleep_ms(self.emulator.cost_ms("ax8850.prefill", prompt_tokens(prompt)))
+            for index in range(count):
+                self.emulator.sleep_ms(self.emulator.cost_ms("ax8850.decode", 1))
+                yield words[index % len(words)] + " "
+
+
 class SdkAx8850Client(Ax8850Client):
     """
     The client for interacting with the actual Axera AX8850 SDK.
@@ -71,12 +111,14 @@ class SdkAx8850Client(Ax8850Client):
         raise NotImplementedError("AX8850 LLM device mode not implemented")
 
 
-def get_ax8850_client(device_mode: bool) -> Ax8850Client:
+def get_ax8850_client(device_mode: bool, emulator_mode: bool = False) -> Ax8850Client:
     """
     Factory function to get the appropriate AX8850 client based on the
-    `DEVICE_MODE` environment variable.
+    `DEVICE_MODE` and `EMULATOR` environment variables.
     """
     if device_mode:
         return SdkAx8850Client()
+    if emulator_mode:
+        return EmulatedAx8850Client()
     return MockAx8850Client()
 
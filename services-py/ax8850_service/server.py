@@ -1,5 +1,4 @@
 import logging
-import os
 import sys
 from pathlib import Path
 from typing import Iterator
@@ -10,8 +9,10 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 sys.path.append(str(Path(__file__).resolve().parents[1] / "common" / "gen"))
 
 from common import utils
-from common.grpc_server import serve
+from common.admission import AdmissionController, MethodLimits, Rejected
+from common.grpc_server import serve_config
 from common.models import ServiceConfig
+from common.pressure import get_monitor
 
 import assistant_pb2
 import assistant_pb2_grpc
@@ -19,22 +20,44 @@ import assistant_pb2_grpc
 from .engine import get_ax8850_client
 
 
+# Defaults for admission control; override with AX8850_<METHOD>_CONCURRENCY/_QUEUE.
+# Running plus queued stays below AX8850_MAX_WORKERS so Health always gets a thread.
+ADMISSION_LIMITS = {
+    "Transcribe": MethodLimits(max_concurrency=1, max_queue=2),
+    "Generate": MethodLimits(max_concurrency=1, max_queue=2),
+}
+
+# max_tokens cap per pressure level (NORMAL, ELEVATED, HIGH, CRITICAL); 0 means no cap.
+PRESSURE_MAX_TOKENS = (0, 512, 256, 128)
+
+
 class Ax8850Service(assistant_pb2_grpc.Ax8850ServiceServicer):
     def __init__(self):
-        self.ax_client = get_ax8850_client(utils.is_device_mode())
+        self.ax_client = get_ax8850_client(utils.is_device_mode(), utils.is_emulator_mode())
+        self.admission = AdmissionController.from_env("AX8850", ADMISSION_LIMITS)
+        self.pressure = get_monitor()
         logging.info(f"Initialized Ax8850Service with client: {self.ax_client.__class__.__name__}")
 
     def Health(self, request, context):
-        return assistant_pb2.HealthResponse(ok=True, message="ok")
+        message = f"ok admission: {self.admission.summary()} pressure: {self.pressure.summary()}"
+        emulator = getattr(self.ax_client, "emulator", None)
+        if emulator is not None:
+            message += f" emulator: {emulator.summary()}"
+        return assistant_pb2.HealthResponse(ok=True, message=message)
 
     def Transcribe(self, request, context):
         try:
-            text, lang, confidence = self.ax_client.transcribe_audio(
-                request.pcm_s16le, request.sample_rate_hz, request.channels
-            )
+            with self.admission.admit("Transcribe", context):
+                text, lang, confidence = self.ax_client.transcribe_audio(
+                    request.pcm_s16le, request.sample_rate_hz, request.channels
+                )
             return assistant_pb2.TranscribeResult(
                 text=text, lang=lang, confidence=confidence
             )
+        except Rejected as exc:
+            context.set_details(str(exc))
+            context.set_code(exc.code)
+            return assistant_pb2.TranscribeResult()
         except Exception as exc:
             logging.error(f"Transcription failed: {exc}", exc_info=True)
             context.set_details(str(exc))
@@ -43,12 +66,25 @@ class Ax8850Service(assistant_pb2_grpc.Ax8850ServiceServicer):
 
     def Generate(self, request, context) -> Iterator[assistant_pb2.GenerateChunk]:
         try:
-            stream = self.ax_client.generate_stream(
-                request.prompt, request.max_tokens, request.temperature
-            )
-            for token in stream:
-                yield assistant_pb2.GenerateChunk(text=token, done=False)
+            with self.admission.admit("Generate", context):
+                max_tokens = request.max_tokens
+                cap = self.pressure.pick(PRESSURE_MAX_TOKENS)
+                if cap and (max_tokens <= 0 or max_tokens > cap):
+                    max_tokens = cap
+                stream = self.ax_client.generate_stream(
+                    request.prompt, max_tokens, request.temperature
+                )
+                for token in stream:
+                    if not context.is_active():
+                        # Caller hung up or timed out; stop spending device time on it.
+                        logging.info("generate_abandoned")
+                        return
+                    yield assistant_pb2.GenerateChunk(text=token, done=False)
             yield assistant_pb2.GenerateChunk(text="", done=True)
+        except Rejected as exc:
+            context.set_details(str(exc))
+            context.set_code(exc.code)
+            return
         except Exception as exc:
             logging.error(f"Generation failed: {exc}", exc_info=True)
             context.set_details(str(exc))
@@ -58,14 +94,11 @@ class Ax8850Service(assistant_pb2_grpc.Ax8850ServiceServicer):
 
 def main():
     logging.basicConfig(level=logging.INFO)
-    host = os.getenv("AX8850_HOST", "127.0.0.1")
-    port = int(os.getenv("AX8850_PORT", "50051"))
-    config = ServiceConfig(host=host, port=port)
-    server = serve(
+    config = ServiceConfig.from_env("AX8850", default_port=50051, default_workers=8)
+    server = serve_config(
         Ax8850Service(),
         assistant_pb2_grpc.add_Ax8850ServiceServicer_to_server,
-        config.host,
-        config.port,
+        config,
     )
     server.wait_for_termination()
 
@@ -0,0 +1,166 @@
+"""
+Fits an emulator cost model (common/emulator.py) from traffic recorded on
+real hardware with the recorder (common/recorder.py).
+
+    PYTHONPATH=services-py:services-py/common/gen python3 -m bench.fit_costs /tmp/rec/*.rec --out cost_model.json
+
+Only successful calls that did not overlap another call to the same service
+are used, so the fitted costs are device time rather than queueing. Calls
+answered from a cache (speculative captures, vision results) are skipped, and
+OCR counts only the regions incremental OCR actually recognized. Each
+operation is fitted as base + units * per_unit by least squares, with the
+spread of the base described as a lognormal. Generate streams are split into
+prefill (time to first token, per prompt token) and decode (ms per further
+token). Operations without enough samples keep the values of --base.
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common" / "gen"))
+
+from common.emulator import DEFAULT_COST_MODEL, fit_linear, fit_per_unit
+from common.recorder import Record, read_records
+
+import assistant_pb2
+
+from ax8850_service.engine import prompt_tokens
+
+
+def _megapixels(width: int, height: int) -> float:
+    return width * height / 1e6
+
+
+def _audio_ms(record: Record, request) -> float:
+    size = record.redacted.get("pcm_s16le", len(request.pcm_s16le))
+    return size / (2 * max(request.channels, 1) * max(request.sample_rate_hz, 1)) * 1000.0
+
+
+# method name -> (operation, request type, units of one request)
+UNARY: Dict[str, Tuple[str, type, Callable[[Record, object], float]]] = {
+    "Transcribe": ("ax8850.transcribe", assistant_pb2.AudioBlob, _audio_ms),
+    "ClassifyPage": ("hailo.classify", assistant_pb2.ImageBlob, lambda record, request: 0.0),
+    "DetectTextRegions": (
+        "hailo.detect",
+        assistant_pb2.ImageBlob,
+        lambda record, request: _megapixels(request.width, request.height),
+    ),
+    "Ocr": (
+        "hailo.ocr",
+        assistant_pb2.ImageWithRegions,
+        lambda record, request: max(0, len(request.regions.regions) - record.reused),
+    ),
+    "CaptureStill": (
+        "camera.capture",
+        assistant_pb2.CaptureRequest,
+        lambda record, request: _megapixels(request.width or 640, request.height or 480),
+    ),
+    "Synthesize": ("tts.synthesize", assistant_pb2.TtsRequest, lambda record, request: len(request.text)),
+}
+
+
+def isolated(records: List[Record]) -> List[Record]:
+    """
+    Returns the OK records that ran alone on their service.
+    """
+    by_service: Dict[str, List[Record]] = defaultdict(list)
+    for record in records:
+        by_service[record.method.rsplit("/", 1)[0]].append(record)
+    kept: List[Record] = []
+    for calls in by_service.values():
+        calls.sort(key=lambda record: record.start)
+        busy_until = float("-inf")
+        for index, record in enumerate(calls):
+            end = record.start + record.latency_ms / 1000.0
+            next_start = calls[index + 1].start if index + 1 < len(calls) else float("inf")
+            if record.start >= busy_until and end <= next_start and record.code == "OK":
+                kept.append(record)
+            busy_until = max(busy_until, end)
+    return kept
+
+
+def collect(records: List[Record]) -> Dict[str, Tuple[List[float], List[float]]]:
+    """
+    Returns {operation: (units, latencies_ms)}; decode holds per-token costs
+    in latencies_ms with units left empty.
+    """
+    samples: Dict[str, Tuple[List[float], List[float]]] = defaultdict(lambda: ([], []))
+    prefill: List[Tuple[int, float]] = []
+    for record in records:
+        name = record.method.rsplit("/", 1)[-1]
+        if record.cache_hit:
+            continue
+        if name in UNARY:
+            operation, request_cls, units = UNARY[name]
+            request = request_cls.FromString(record.request)
+            samples[operation][0].append(float(units(record, request)))
+            samples[operation][1].append(record.latency_ms)
+        elif name == "Generate" and record.first_ms is not None:
+            request = assistant_pb2.GenerateRequest.FromString(record.request)
+            # The last chunk is the empty done marker.
+            tokens = record.responses - 1
+            if tokens >= 2:
+                samples["ax8850.decode"][1].append((record.latency_ms - record.first_ms) / (tokens - 1))
+            if tokens >= 1:
+                prefill.append((prompt_tokens(request.prompt), record.first_ms))
+    if prefill:
+        decode = samples["ax8850.decode"][1]
+        first_token_ms = sum(decode) / len(decode) if decode else 0.0
+        for count, first_ms in prefill:
+            samples["ax8850.prefill"][0].append(float(count))
+            samples["ax8850.prefill"][1].append(max(0.0, first_ms - first_token_ms))
+    return samples
+
+
+def fit(
+    records: List[Record], base: dict, min_samples: int, include_overlapping: bool = False
+) -> Tuple[dict, Dict[str, int]]:
+    """
+    Returns (updated cost model, {operation: samples used}).
+    """
+    model = json.loads(json.dumps(base))
+    used = collect(records if include_overlapping else isolated(records))
+    counts: Dict[str, int] = {}
+    for operation, (units, latencies) in sorted(used.items()):
+        counts[operation] = len(latencies)
+        if len(latencies) < min_samples or operation not in model["operations"]:
+            continue
+        fitted = fit_per_unit(latencies) if operation == "ax8850.decode" else fit_linear(units, latencies)
+        entry = model["operations"][operation]
+        entry["base_ms"] = fitted["base_ms"]
+        entry["per_unit_ms"] = fitted["per_unit_ms"]
+        entry["samples"] = fitted["samples"]
+    return model, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="traffic logs written by the recorder")
+    parser.add_argument("--base", default=DEFAULT_COST_MODEL, help="cost model to start from")
+    parser.add_argument("--out", default="", help="where to write the fitted model (default: stdout)")
+    parser.add_argument("--min-samples", type=int, default=5, help="samples needed to refit an operation")
+    parser.add_argument(
+        "--include-overlapping", action="store_true", help="also use calls that queued behind others"
+    )
+    args = parser.parse_args()
+
+    with open(args.base, "r", encoding="utf-8") as handle:
+        base = json.load(handle)
+    records = [record for path in args.logs for record in read_records(path)]
+    model, counts = fit(records, base, args.min_samples, args.include_overlapping)
+    for operation, count in counts.items():
+        status = "fitted" if count >= args.min_samples and operation in model["operations"] else "kept"
+        print(f"{operation:<20}{count:>6} samples  {status}", file=sys.stderr)
+    encoded = json.dumps(model, indent=2) + "\n"
+    if args.out:
+        Path(args.out).write_text(encoded, encoding="utf-8")
+    else:
+        sys.stdout.write(encoded)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Replays a recorded traffic log against running services and compares
+latencies with the recording.
+
+Record with e.g. `GRPC_RECORD_DIR=/tmp/rec` (see common/recorder.py), then:
+
+    PYTHONPATH=services-py:services-py/common/gen python3 -m bench.replay /tmp/rec/vision.rec
+    PYTHONPATH=services-py:services-py/common/gen python3 -m bench.replay /tmp/rec/*.rec --speed 2
+    PYTHONPATH=services-py:services-py/common/gen python3 -m bench.replay /tmp/rec/tts.rec --speed max
+
+Calls are sent open-loop at their recorded offsets divided by --speed
+(`max` sends them back to back from --concurrency threads). Each call gets
+its recorded deadline. Services are addressed through the usual
+`<PREFIX>_PORT` / `<PREFIX>_UDS` environment.
+
+Logs recorded with redaction replay images as blank pages and audio as
+silence (see common/recorder.py), so content-dependent work such as
+incremental OCR reuse is not reproduced.
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import grpc
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common" / "gen"))
+
+from common.grpc_server import insecure_channel
+from common.models import ServiceConfig
+from common.recorder import Record, read_records, restore
+
+import assistant_pb2
+
+from .transport import _percentile
+
+
+SERVICES = {
+    "Ax8850Service": ("AX8850", 50051),
+    "VisionService": ("VISION", 50052),
+    "CameraService": ("CAMERA", 50053),
+    "TtsService": ("TTS", 50054),
+    "RetrievalService": ("RETRIEVAL", 50055),
+}
+
+
+class _Caller:
+    """
+    Builds one multi-callable per recorded method from the proto descriptors.
+    """
+
+    def __init__(self):
+        self._channels: Dict[str, grpc.Channel] = {}
+        self._callables: Dict[str, Tuple[object, type]] = {}
+
+    def _resolve(self, method: str) -> Tuple[object, type]:
+        if method not in self._callables:
+            _, service_path, method_name = method.split("/")
+            service_name = service_path.rsplit(".", 1)[-1]
+            descriptor = assistant_pb2.DESCRIPTOR.services_by_name[service_name].methods_by_name[method_name]
+            request_cls = getattr(assistant_pb2, descriptor.input_type.name)
+            response_cls = getattr(assistant_pb2, descriptor.output_type.name)
+            if service_name not in self._channels:
+                prefix, port = SERVICES[service_name]
+                self._channels[service_name] = insecure_channel(ServiceConfig.from_env(prefix, port))
+            channel = self._channels[service_name]
+            factory = channel.unary_stream if descriptor.server_streaming else channel.unary_unary
+            multi = factory(
+                method,
+                request_serializer=request_cls.SerializeToString,
+                response_deserializer=response_cls.FromString,
+            )
+            self._callables[method] = (multi, request_cls)
+        return self._callables[method]
+
+    def call(self, record: Record) -> Tuple[float, Optional[float], str]:
+        multi, request_cls = self._resolve(record.method)
+        request = request_cls.FromString(record.request)
+        restore(request, record.redacted)
+        timeout = record.deadline_ms / 1000.0 if record.deadline_ms else None
+        start = time.perf_counter()
+        first_ms = None
+        try:
+            if record.stream:
+                for _ in multi(request, timeout=timeout):
+                    if first_ms is None:
+                        first_ms = (time.perf_counter() - start) * 1000.0
+            else:
+                multi(request, timeout=timeout)
+            code = grpc.StatusCode.OK.name
+        except grpc.RpcError as exc:
+            code = exc.code().name
+        return (time.perf_counter() - start) * 1000.0, first_ms, code
+
+    def close(self) -> None:
+        for channel in self._channels.values():
+            channel.close()
+
+
+def _describe(samples: List[float]) -> str:
+    if not samples:
+        return f"{'-':>9}{'-':>9}{'-':>9}{'-':>9}"
+    return (
+        f"{statistics.median(samples):>9.1f}{_percentile(samples, 90):>9.1f}"
+        f"{_percentile(samples, 99):>9.1f}{max(samples):>9.1f}"
+    )
+
+
+def replay(
+    records: List[Record], speed: Optional[float], concurrency: int
+) -> List[Tuple[Record, float, Optional[float], str]]:
+    caller = _Caller()
+    results: List[Tuple[Record, float, Optional[float], str]] = []
+    lock = threading.Lock()
+
+    def run(record: Record) -> None:
+        latency_ms, first_ms, code = caller.call(record)
+        with lock:
+            results.append((record, latency_ms, first_ms, code))
+
+    origin = records[0].start
+    workers = concurrency if speed is None else max(concurrency, 64)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            replay_start = time.perf_counter()
+            for record in records:
+                if speed is not None:
+                    delay = (record.start - origin) / speed - (time.perf_counter() - replay_start)
+                    if delay > 0:
+                        time.sleep(delay)
+                pool.submit(run, record)
+    finally:
+        caller.close()
+    return results
+
+
+def report(results: List[Tuple[Record, float, Optional[float], str]], replayed_run: bool = True) -> None:
+    recorded: Dict[str, List[float]] = defaultdict(list)
+    replayed: Dict[str, List[float]] = defaultdict(list)
+    codes: Dict[str, Counter] = defaultdict(Counter)
+    for record, latency_ms, first_ms, code in results:
+        name = record.method.rsplit("/", 1)[-1]
+        recorded[name].append(record.latency_ms)
+        replayed[name].append(latency_ms)
+        if record.stream and record.first_ms is not None and first_ms is not None:
+            recorded[f"{name}:first"].append(record.first_ms)
+            replayed[f"{name}:first"].append(first_ms)
+        if code != record.code:
+            codes[name][f"{record.code}->{code}"] += 1
+
+    header = f"{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+    if not replayed_run:
+        print(f"{'method':<22}{'n':>6}  recorded (ms)")
+        print(f"{'':<22}{'':>6}  {header}")
+        for name in sorted(recorded):
+            print(f"{name:<22}{len(recorded[name]):>6}  {_describe(recorded[name])}")
+        return
+    print(f"{'method':<22}{'n':>6}  recorded (ms){' ' * 23}replayed (ms)")
+    print(f"{'':<22}{'':>6}  {header}  {header}  {'p50 x':>8}{'p99 x':>8}")
+    for name in sorted(recorded):
+        before, after = recorded[name], replayed[name]
+        p50_ratio = statistics.median(after) / max(statistics.median(before), 1e-3)
+        p99_ratio = _percentile(after, 99) / max(_percentile(before, 99), 1e-3)
+        print(f"{name:<22}{len(before):>6}  {_describe(before)}  {_describe(after)}  {p50_ratio:>8.2f}{p99_ratio:>8.2f}")
+    for name, changes in sorted(codes.items()):
+        print(f"status changes for {name}: " + ", ".join(f"{change}={n}" for change, n in changes.most_common()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="traffic logs written by the recorder")
+    parser.add_argument("--speed", default="1", help="time scale (2 = twice as fast) or 'max'")
+    parser.add_argument("--concurrency", type=int, default=8, help="callers for --speed max")
+    parser.add_argument("--methods", default="", help="comma-separated method names to replay (default: all)")
+    parser.add_argument("--summary", action="store_true", help="print the recorded distribution without replaying")
+    args = parser.parse_args()
+
+    wanted = {name for name in args.methods.split(",") if name}
+    records = sorted(
+        (
+            record
+            for path in args.logs
+            for record in read_records(path)
+            if not wanted or record.method.rsplit("/", 1)[-1] in wanted
+        ),
+        key=lambda record: record.start,
+    )
+    if not records:
+        print("no records")
+        return
+    span = records[-1].start - records[0].start
+    print(f"{len(records)} calls over {span:.1f}s from {len(args.logs)} log(s)")
+    if args.summary:
+        report([(record, record.latency_ms, record.first_ms, record.code) for record in records], replayed_run=False)
+        return
+    speed = None if args.speed == "max" else float(args.speed)
+    started = time.perf_counter()
+    results = replay(records, speed, args.concurrency)
+    print(f"replayed in {time.perf_counter() - started:.1f}s (speed={args.speed})")
+    report(results)
+
+
+if __name__ == "__main__":
+    main()
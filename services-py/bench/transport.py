@@ -0,0 +1,131 @@
+"""
+Compares loopback TCP against a Unix domain socket for large payloads.
+
+Run from the repo root after `make proto`:
+
+    PYTHONPATH=services-py:services-py/common/gen python3 -m bench.transport
+
+Each transport gets its own in-process server with trivial handlers, so the
+numbers reflect serialization and transport cost rather than engine time.
+"""
+import argparse
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common" / "gen"))
+
+from common.grpc_server import insecure_channel, serve_config
+from common.models import ServiceConfig
+
+import assistant_pb2
+import assistant_pb2_grpc
+
+
+class _EchoVision(assistant_pb2_grpc.VisionServiceServicer):
+    def ClassifyPage(self, request, context):
+        return assistant_pb2.PageTypeResult(page_type="bench", confidence=float(len(request.data)))
+
+
+class _EchoAx8850(assistant_pb2_grpc.Ax8850ServiceServicer):
+    def Transcribe(self, request, context):
+        return assistant_pb2.TranscribeResult(text="", lang="en", confidence=float(len(request.pcm_s16le)))
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _measure(call: Callable[[], object], iterations: int, warmup: int) -> Dict[str, float]:
+    for _ in range(warmup):
+        call()
+    latencies = []
+    cpu_start = _cpu_seconds()
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000.0)
+    wall = time.perf_counter() - wall_start
+    cpu = _cpu_seconds() - cpu_start
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": _percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies),
+        # Client and server share this process, so this is the total CPU per call.
+        "cpu_ms_per_call": cpu * 1000.0 / iterations,
+        "cpu_util": cpu / wall if wall else 0.0,
+    }
+
+
+def _start(config: ServiceConfig):
+    vision = serve_config(_EchoVision(), assistant_pb2_grpc.add_VisionServiceServicer_to_server, config)
+    ax8850 = replace(
+        config,
+        port=config.port + 1 if config.port else 0,
+        uds_path=config.uds_path + ".audio" if config.uds_path else "",
+    )
+    audio = serve_config(_EchoAx8850(), assistant_pb2_grpc.add_Ax8850ServiceServicer_to_server, ax8850)
+    return (vision, config), (audio, ax8850)
+
+
+def run(image_bytes: int, audio_seconds: float, iterations: int, warmup: int, port: int) -> None:
+    image = assistant_pb2.ImageBlob(data=os.urandom(image_bytes), mime="image/jpeg", width=4056, height=3040)
+    audio = assistant_pb2.AudioBlob(
+        pcm_s16le=os.urandom(int(16000 * audio_seconds) * 2), sample_rate_hz=16000, channels=1
+    )
+
+    with tempfile.TemporaryDirectory(prefix="grpc-bench-") as sock_dir:
+        transports = {
+            "tcp": ServiceConfig(port=port),
+            "uds": ServiceConfig(port=0, uds_path=os.path.join(sock_dir, "bench.sock")),
+        }
+        print(f"payloads: image={image_bytes} bytes, audio={len(audio.pcm_s16le)} bytes")
+        print(f"{'transport':<10}{'payload':<8}{'p50_ms':>10}{'p99_ms':>10}{'mean_ms':>10}{'cpu_ms':>10}{'cpu%':>8}")
+        for name, config in transports.items():
+            (vision_server, vision_cfg), (audio_server, audio_cfg) = _start(config)
+            try:
+                vision_stub = assistant_pb2_grpc.VisionServiceStub(insecure_channel(vision_cfg))
+                audio_stub = assistant_pb2_grpc.Ax8850ServiceStub(insecure_channel(audio_cfg))
+                cases = {
+                    "image": lambda: vision_stub.ClassifyPage(image),
+                    "audio": lambda: audio_stub.Transcribe(audio),
+                }
+                for payload, call in cases.items():
+                    stats = _measure(call, iterations, warmup)
+                    print(
+                        f"{name:<10}{payload:<8}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+                        f"{stats['mean_ms']:>10.2f}{stats['cpu_ms_per_call']:>10.2f}{stats['cpu_util'] * 100:>7.0f}%"
+                    )
+            finally:
+                vision_server.stop(None)
+                audio_server.stop(None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--image-mb", type=float, default=6.0, help="ImageBlob payload size in MB")
+    parser.add_argument("--audio-seconds", type=float, default=30.0, help="AudioBlob length at 16 kHz mono")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--port", type=int, default=50151, help="first TCP port to bind")
+    args = parser.parse_args()
+    run(int(args.image_mb * 1024 * 1024), args.audio_seconds, args.iterations, args.warmup, args.port)
+
+
+if __name__ == "__main__":
+    main()
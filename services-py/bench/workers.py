@@ -0,0 +1,143 @@
+"""
+Measures small-RPC latency while heavy TTS and vision requests run, with
+CPU-bound stages inline on the gRPC threads versus in worker processes.
+
+Run from the repo root after `make proto` (mock mode):
+
+    PYTHONPATH=services-py:services-py/common/gen python3 -m bench.workers
+
+For each mode a TtsService and a VisionService are served in-process. Load
+threads keep issuing Synthesize and incremental Ocr calls while a probe
+calls TtsService.Health and reports its latency distribution.
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common" / "gen"))
+
+from common.grpc_server import insecure_channel, serve_config
+from common.models import ServiceConfig
+
+import assistant_pb2
+import assistant_pb2_grpc
+
+from .transport import _percentile
+
+
+def _page(seed: int, width: int = 1600, height: int = 1200) -> bytes:
+    from PIL import Image, ImageDraw
+
+    image = Image.new("L", (width, height), 235)
+    draw = ImageDraw.Draw(image)
+    for row in range(20):
+        y = 40 + row * 55 + seed % 7
+        for col in range(60):
+            x = 40 + col * 25 + seed % 5
+            draw.rectangle([x, y, x + 8 + (row * col + seed) % 12, y + 20], fill=30)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+def _load(stop: threading.Event, call, counts: Dict[str, int], name: str) -> None:
+    while not stop.is_set():
+        call()
+        counts[name] = counts.get(name, 0) + 1
+
+
+def run_mode(workers: int, seconds: float, load_threads: int, port: int) -> Dict[str, float]:
+    os.environ["TTS_CPU_WORKERS"] = str(workers)
+    os.environ["VISION_CPU_WORKERS"] = str(workers)
+    # Admission limits would reject part of the load; lift them for the benchmark.
+    os.environ["TTS_SYNTHESIZE_QUEUE"] = os.environ["VISION_OCR_QUEUE"] = str(load_threads)
+    os.environ["TTS_SYNTHESIZE_CONCURRENCY"] = os.environ["VISION_OCR_CONCURRENCY"] = str(load_threads)
+    from hailo_vision_service.server import VisionService
+    from tts_service.server import TtsService
+
+    tts_service, vision_service = TtsService(), VisionService()
+    # Keep threads above admission capacity (all methods, not just the loaded
+    # ones) with room left for the Health probes being measured.
+    tts_config = ServiceConfig(port=port, max_workers=tts_service.admission.capacity() + 2)
+    vision_config = ServiceConfig(port=port + 1, max_workers=vision_service.admission.capacity() + 2)
+    tts_server = serve_config(tts_service, assistant_pb2_grpc.add_TtsServiceServicer_to_server, tts_config)
+    vision_server = serve_config(vision_service, assistant_pb2_grpc.add_VisionServiceServicer_to_server, vision_config)
+    try:
+        tts = assistant_pb2_grpc.TtsServiceStub(insecure_channel(tts_config))
+        vision = assistant_pb2_grpc.VisionServiceStub(insecure_channel(vision_config))
+        pages = [_page(seed) for seed in range(4)]
+        regions = assistant_pb2.Regions(
+            regions=[assistant_pb2.Region(x=36, y=36 + i * 55, w=1500, h=28, confidence=0.9) for i in range(3)]
+        )
+        text = "The area of a circle is pi times the radius squared. " * 4
+        frame = iter(range(1 << 30))
+
+        def synthesize():
+            tts.Synthesize(assistant_pb2.TtsRequest(text=text, lang="en"))
+
+        def ocr():
+            data = pages[next(frame) % len(pages)]
+            image = assistant_pb2.ImageBlob(data=data, mime="image/jpeg", width=1600, height=1200)
+            vision.Ocr(assistant_pb2.ImageWithRegions(image=image, regions=regions, session_id="bench"))
+
+        for _ in range(3):
+            tts.Health(assistant_pb2.HealthRequest())
+        stop = threading.Event()
+        counts: Dict[str, int] = {}
+        threads = [
+            threading.Thread(target=_load, args=(stop, call, counts, name), daemon=True)
+            for name, call in (("tts", synthesize), ("ocr", ocr))
+            for _ in range(load_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.5)
+        latencies: List[float] = []
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            tts.Health(assistant_pb2.HealthRequest())
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            time.sleep(0.01)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return {
+            "p50_ms": statistics.median(latencies),
+            "p99_ms": _percentile(latencies, 99),
+            "max_ms": max(latencies),
+            "tts_rps": counts.get("tts", 0) / seconds,
+            "ocr_rps": counts.get("ocr", 0) / seconds,
+        }
+    finally:
+        tts_server.stop(None)
+        vision_server.stop(None)
+        for service in (tts_service.tts_client, vision_service):
+            service.workers.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--load-threads", type=int, default=2, help="concurrent callers per heavy method")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes per service in pooled mode")
+    parser.add_argument("--port", type=int, default=50161)
+    args = parser.parse_args()
+    print(f"{'mode':<10}{'p50_ms':>10}{'p99_ms':>10}{'max_ms':>10}{'tts/s':>8}{'ocr/s':>8}")
+    for name, workers in (("inline", 0), (f"pool({args.workers})", args.workers)):
+        stats = run_mode(workers, args.seconds, args.load_threads, args.port)
+        print(
+            f"{name:<10}{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}"
+            f"{stats['tts_rps']:>8.1f}{stats['ocr_rps']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ from typing import Tuple
 from pathlib import Path
 import os
 
+from common.emulator import get_emulator
+
 
 class CameraClient(ABC):
     @abstractmethod
@@ -34,6 +36,19 @@ class MockCameraClient(CameraClient):
         return data, mime, width, height
 
 
+class EmulatedCameraClient(MockCameraClient):
+    """
+    The mock capture with sensor timing from the emulator cost model.
+    """
+    def __init__(self):
+        super().__init__()
+        self.emulator = get_emulator()
+
+    def capture_still(self, width: int, height: int, fmt: str) -> Tuple[bytes, str, int, int]:
+        self.emulator.run("camera.capture", width * height / 1e6)
+        return super().capture_still(width, height, fmt)
+
+
 class SdkCameraClient(CameraClient):
     """
     The client for interacting with the actual camera hardware.
@@ -83,11 +98,13 @@ class SdkCameraClient(CameraClient):
         return data, mime, width, height
 
 
-def get_camera_client(device_mode: bool) -> CameraClient:
+def get_camera_client(device_mode: bool, emulator_mode: bool = False) -> CameraClient:
     """
     Factory function to get the appropriate Camera client based on the
-    `DEVICE_MODE` environment variable.
+    `DEVICE_MODE` and `EMULATOR` environment variables.
     """
     if device_mode:
         return SdkCameraClient()
+    if emulator_mode:
+        return EmulatedCameraClient()
     return MockCameraClient()
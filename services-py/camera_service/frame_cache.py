@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+
+Frame = Tuple[bytes, str, int, int]
+CaptureKey = Tuple[int, int, str]
+
+# Longest `take` waits for an in-flight capture when the caller has no deadline.
+TAKE_TIMEOUT_S = 5.0
+
+
+@dataclass
+class _Entry:
+    key: CaptureKey
+    ttl_s: float
+    future: "Future[Tuple[Frame, float]]"
+    ready_at: Optional[float] = None
+
+
+class FrameCache:
+    """
+    Holds at most one speculatively captured frame.
+
+    `prepare` starts a capture on a background thread; `take` hands the frame
+    to the next matching CaptureStill, waiting for an in-flight capture rather
+    than starting a second one. Frames are used once and expire `ttl_s` after
+    the capture finished. `on_ready` callbacks run on their own thread, so a
+    slow consumer neither blocks the caller of `prepare` nor the next capture.
+    """
+
+    def __init__(self, capture: Callable[[int, int, str], Frame], default_ttl_s: float):
+        self._capture = capture
+        self.default_ttl_s = default_ttl_s
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="precapture")
+        self._notify_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="precapture-ready")
+        self._lock = threading.Lock()
+        self._entry: Optional[_Entry] = None
+        self._counts: Counter = Counter()
+        self._saved_ms = 0.0
+
+    def _run(self, key: CaptureKey) -> Tuple[Frame, float]:
+        start = time.monotonic()
+        frame = self._capture(*key)
+        return frame, (time.monotonic() - start) * 1000.0
+
+    def prepare(
+        self, key: CaptureKey, ttl_s: float = 0.0, on_ready: Optional[Callable[[Frame], None]] = None
+    ) -> float:
+        ttl_s = ttl_s or self.default_ttl_s
+        with self._lock:
+            entry = self._entry
+            if entry is not None and entry.key == key and not self._expired(entry):
+                # A capture for this request is already pending or fresh; reuse it.
+                entry.ttl_s = max(entry.ttl_s, ttl_s)
+                self._counts["prepare_reused"] += 1
+            else:
+                entry = _Entry(key=key, ttl_s=ttl_s, future=self._executor.submit(self._run, key))
+                self._entry = entry
+                self._counts["prepare"] += 1
+                entry.future.add_done_callback(lambda _f, e=entry: self._mark_ready(e))
+        if on_ready is not None:
+            def notify(future: Future) -> None:
+                if future.exception() is None:
+                    self._notify_executor.submit(on_ready, future.result()[0])
+
+            entry.future.add_done_callback(notify)
+        return ttl_s
+
+    def _mark_ready(self, entry: _Entry) -> None:
+        entry.ready_at = time.monotonic()
+        if entry.future.exception() is not None:
+            logging.warning(f"Speculative capture failed: {entry.future.exception()}")
+
+    @staticmethod
+    def _expired(entry: _Entry) -> bool:
+        return entry.ready_at is not None and time.monotonic() - entry.ready_at > entry.ttl_s
+
+    def take(self, key: CaptureKey, timeout_s: Optional[float] = None) -> Optional[Frame]:
+        timeout_s = TAKE_TIMEOUT_S if timeout_s is None else min(timeout_s, TAKE_TIMEOUT_S)
+        with self._lock:
+            entry = self._entry
+            if entry is None or entry.key != key:
+                self._counts["miss"] += 1
+                return None
+            self._entry = None
+        wait_start = time.monotonic()
+        pending = not entry.future.done()
+        try:
+            frame, capture_ms = entry.future.result(timeout=timeout_s)
+        except FutureTimeout:
+            self._count("miss_timeout")
+            return None
+        except Exception:
+            self._count("miss_failed")
+            return None
+        if self._expired(entry):
+            self._count("expired")
+            return None
+        waited_ms = (time.monotonic() - wait_start) * 1000.0
+        saved_ms = max(0.0, capture_ms - waited_ms)
+        with self._lock:
+            self._counts["hit_inflight" if pending else "hit"] += 1
+            self._saved_ms += saved_ms
+        logging.info(f"CaptureStill served from speculative frame, saved {saved_ms:.0f}ms")
+        return frame
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            out: Dict[str, float] = dict(self._counts)
+            out["saved_ms"] = round(self._saved_ms, 1)
+        return out
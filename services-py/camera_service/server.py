@@ -1,6 +1,7 @@
 import logging
 import os
 import sys
+import threading
 from pathlib import Path
 
 import grpc
@@ -9,32 +10,119 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 sys.path.append(str(Path(__file__).resolve().parents[1] / "common" / "gen"))
 
 from common import utils
-from common.grpc_server import serve
+from common.admission import AdmissionController, MethodLimits, Rejected
+from common.grpc_server import insecure_channel, serve_config
 from common.models import ServiceConfig
+from common.pressure import get_monitor
+from common.recorder import mark_cache_hit
 
 import assistant_pb2
 import assistant_pb2_grpc
 
 from .engine import get_camera_client
+from .frame_cache import Frame, FrameCache
+
+
+# Defaults for admission control; override with CAMERA_<METHOD>_CONCURRENCY/_QUEUE.
+# Running plus queued stays below CAMERA_MAX_WORKERS so PrepareCapture and Health
+# always get a thread.
+ADMISSION_LIMITS = {
+    "CaptureStill": MethodLimits(max_concurrency=1, max_queue=1),
+}
+
+
+DEFAULT_PREPARE_TTL_MS = 8000
+# Capture size scale per pressure level (NORMAL, ELEVATED, HIGH, CRITICAL).
+PRESSURE_CAPTURE_SCALE = (1.0, 1.0, 0.75, 0.5)
+# Deadline for each speculative vision call; results only matter if they land before STT does.
+PREFETCH_TIMEOUT_S = 5.0
+
+
+def _capture_key(request) -> tuple:
+    return request.width or 640, request.height or 480, request.format or "jpeg"
 
 
 class CameraService(assistant_pb2_grpc.CameraServiceServicer):
     def __init__(self):
-        self.camera_client = get_camera_client(utils.is_device_mode())
+        self.camera_client = get_camera_client(utils.is_device_mode(), utils.is_emulator_mode())
+        self.admission = AdmissionController.from_env("CAMERA", ADMISSION_LIMITS)
+        # The sensor can only be driven by one capture at a time.
+        self._camera_lock = threading.Lock()
+        ttl_ms = int(os.getenv("CAMERA_PREPARE_TTL_MS", str(DEFAULT_PREPARE_TTL_MS)))
+        self.frame_cache = FrameCache(self._capture, ttl_ms / 1000.0)
+        self._vision_stub = None
+        self.pressure = get_monitor()
         logging.info(f"Initialized CameraService with client: {self.camera_client.__class__.__name__}")
 
+    def _capture(self, width: int, height: int, fmt: str) -> Frame:
+        scale = self.pressure.pick(PRESSURE_CAPTURE_SCALE)
+        if scale < 1.0:
+            # The returned ImageBlob reports the reduced size.
+            width, height = int(width * scale) // 2 * 2, int(height * scale) // 2 * 2
+        with self._camera_lock:
+            return self.camera_client.capture_still(width, height, fmt)
+
+    def _prefetch_vision(self, frame: Frame) -> None:
+        """
+        Warms VisionService's result cache with the speculative frame. Runs on
+        the frame cache's notify thread; failures only cost the speculation.
+        """
+        data, mime, width, height = frame
+        try:
+            if self._vision_stub is None:
+                channel = insecure_channel(ServiceConfig.from_env("VISION", 50052))
+                self._vision_stub = assistant_pb2_grpc.VisionServiceStub(channel)
+            image = assistant_pb2.ImageBlob(data=data, mime=mime, width=width, height=height)
+            self._vision_stub.ClassifyPage(image, timeout=PREFETCH_TIMEOUT_S)
+            regions = self._vision_stub.DetectTextRegions(image, timeout=PREFETCH_TIMEOUT_S)
+            self._vision_stub.Ocr(
+                assistant_pb2.ImageWithRegions(image=image, regions=regions), timeout=PREFETCH_TIMEOUT_S
+            )
+        except Exception as exc:
+            logging.warning(f"Speculative vision prefetch failed: {exc}")
+
     def Health(self, request, context):
-        return assistant_pb2.HealthResponse(ok=True, message="ok")
+        stats = " ".join(f"{name}={value}" for name, value in sorted(self.frame_cache.stats().items()))
+        message = (
+            f"ok precapture: {stats} admission: {self.admission.summary()} "
+            f"pressure: {self.pressure.summary()}"
+        )
+        emulator = getattr(self.camera_client, "emulator", None)
+        if emulator is not None:
+            message += f" emulator: {emulator.summary()}"
+        return assistant_pb2.HealthResponse(ok=True, message=message)
+
+    def PrepareCapture(self, request, context):
+        try:
+            ttl_s = self.frame_cache.prepare(
+                _capture_key(request.capture),
+                request.ttl_ms / 1000.0,
+                self._prefetch_vision if request.prefetch_vision else None,
+            )
+            return assistant_pb2.PrepareCaptureResult(accepted=True, ttl_ms=int(ttl_s * 1000))
+        except Exception as exc:
+            logging.error(f"PrepareCapture failed: {exc}", exc_info=True)
+            context.set_details(str(exc))
+            context.set_code(grpc.StatusCode.INTERNAL)
+            return assistant_pb2.PrepareCaptureResult()
 
     def CaptureStill(self, request, context):
         try:
-            width = request.width or 640
-            height = request.height or 480
-            fmt = request.format or "jpeg"
-            data, mime, width, height = self.camera_client.capture_still(width, height, fmt)
+            width, height, fmt = _capture_key(request)
+            with self.admission.admit("CaptureStill", context):
+                frame = self.frame_cache.take((width, height, fmt), context.time_remaining())
+                if frame is None:
+                    frame = self._capture(width, height, fmt)
+                else:
+                    mark_cache_hit(context)
+                data, mime, width, height = frame
             return assistant_pb2.ImageBlob(
                 data=data, mime=mime, width=width, height=height
             )
+        except Rejected as exc:
+            context.set_details(str(exc))
+            context.set_code(exc.code)
+            return assistant_pb2.ImageBlob()
         except Exception as exc:
             logging.error(f"CaptureStill failed: {exc}", exc_info=True)
             context.set_details(str(exc))
@@ -44,14 +132,11 @@ class CameraService(assistant_pb2_grpc.CameraServiceServicer):
 
 def main():
     logging.basicConfig(level=logging.INFO)
-    host = os.getenv("CAMERA_HOST", "127.0.0.1")
-    port = int(os.getenv("CAMERA_PORT", "50053"))
-    config = ServiceConfig(host=host, port=port)
-    server = serve(
+    config = ServiceConfig.from_env("CAMERA", default_port=50053, default_workers=4)
+    server = serve_config(
         CameraService(),
         assistant_pb2_grpc.add_CameraServiceServicer_to_server,
-        config.host,
-        config.port,
+        config,
     )
     server.wait_for_termination()
 
@@ -0,0 +1,192 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+import grpc
+
+
+# How often a queued request re-checks its deadline and client connection.
+_POLL_INTERVAL_S = 0.05
+_EWMA_ALPHA = 0.2
+
+
+@dataclass
+class MethodLimits:
+    max_concurrency: int = 1
+    max_queue: int = 8
+
+
+class Rejected(Exception):
+    """
+    Raised when admission control refuses or drops a request. Handlers map it
+    onto the RPC status with `context.set_code(exc.code)`.
+    """
+
+    def __init__(self, method: str, reason: str, code: grpc.StatusCode, detail: str = ""):
+        super().__init__(f"{method} rejected: {reason}{f' ({detail})' if detail else ''}")
+        self.method = method
+        self.reason = reason
+        self.code = code
+
+
+class MethodLimiter:
+    """
+    Concurrency limit plus a bounded wait queue for one RPC method.
+
+    Keeps an exponentially weighted average of service time so the expected
+    queue wait can be compared against the caller's remaining deadline before
+    the request is queued.
+    """
+
+    def __init__(self, method: str, limits: MethodLimits):
+        self.method = method
+        self.limits = limits
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._service_time_s: Optional[float] = None
+
+    def _estimated_wait_locked(self) -> float:
+        if self._active < self.limits.max_concurrency or self._service_time_s is None:
+            return 0.0
+        # Everyone queued ahead of us plus ourselves, served max_concurrency at a time.
+        rounds = (self._waiting + 1) / float(self.limits.max_concurrency)
+        return rounds * self._service_time_s
+
+    def acquire(self, context) -> None:
+        with self._cond:
+            remaining = context.time_remaining()
+            if remaining is not None and remaining <= 0:
+                raise Rejected(self.method, "deadline_expired", grpc.StatusCode.DEADLINE_EXCEEDED)
+            if self._active < self.limits.max_concurrency and self._waiting == 0:
+                self._active += 1
+                return
+            if self._waiting >= self.limits.max_queue:
+                raise Rejected(
+                    self.method,
+                    "queue_full",
+                    grpc.StatusCode.RESOURCE_EXHAUSTED,
+                    f"{self._waiting} waiting",
+                )
+            estimated = self._estimated_wait_locked()
+            if remaining is not None and estimated > remaining:
+                raise Rejected(
+                    self.method,
+                    "deadline_too_short",
+                    grpc.StatusCode.RESOURCE_EXHAUSTED,
+                    f"estimated wait {estimated * 1000:.0f}ms > remaining {remaining * 1000:.0f}ms",
+                )
+
+            self._waiting += 1
+            try:
+                while self._active >= self.limits.max_concurrency:
+                    remaining = context.time_remaining()
+                    if remaining is not None and remaining <= 0:
+                        raise Rejected(self.method, "deadline_expired", grpc.StatusCode.DEADLINE_EXCEEDED)
+                    if not context.is_active():
+                        raise Rejected(self.method, "client_gone", grpc.StatusCode.CANCELLED)
+                    timeout = _POLL_INTERVAL_S if remaining is None else min(remaining, _POLL_INTERVAL_S)
+                    self._cond.wait(timeout)
+                self._active += 1
+            finally:
+                self._waiting -= 1
+
+    def release(self, service_time_s: float) -> None:
+        with self._cond:
+            self._active -= 1
+            if self._service_time_s is None:
+                self._service_time_s = service_time_s
+            else:
+                self._service_time_s += _EWMA_ALPHA * (service_time_s - self._service_time_s)
+            self._cond.notify()
+
+
+def _env_name(method: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", method).upper()
+
+
+class AdmissionController:
+    """
+    Per-method admission for a servicer. Methods without limits are admitted
+    unconditionally, which keeps `Health` cheap under load.
+    """
+
+    def __init__(self, service: str, limits: Dict[str, MethodLimits]):
+        self.service = service
+        self._limiters = {method: MethodLimiter(method, lim) for method, lim in limits.items()}
+        self._rejections: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, prefix: str, defaults: Dict[str, MethodLimits]) -> "AdmissionController":
+        """
+        Overrides limits from `<PREFIX>_<METHOD>_CONCURRENCY` and
+        `<PREFIX>_<METHOD>_QUEUE`, e.g. `VISION_DETECT_TEXT_REGIONS_QUEUE=4`.
+        """
+        limits = {}
+        for method, default in defaults.items():
+            key = f"{prefix}_{_env_name(method)}"
+            limits[method] = MethodLimits(
+                max_concurrency=int(os.getenv(f"{key}_CONCURRENCY", str(default.max_concurrency))),
+                max_queue=int(os.getenv(f"{key}_QUEUE", str(default.max_queue))),
+            )
+        return cls(prefix.lower(), limits)
+
+    @contextmanager
+    def admit(self, method: str, context) -> Iterator[None]:
+        limiter = self._limiters.get(method)
+        if limiter is None:
+            yield
+            return
+        try:
+            limiter.acquire(context)
+        except Rejected as exc:
+            self._record(exc)
+            raise
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            limiter.release(time.monotonic() - start)
+
+    def _record(self, exc: Rejected) -> None:
+        with self._lock:
+            self._rejections[(exc.method, exc.reason)] += 1
+            count = self._rejections[(exc.method, exc.reason)]
+        logging.warning(
+            "admission_rejected %s count=%d",
+            exc,
+            count,
+            extra={
+                "service": self.service,
+                "method": exc.method,
+                "reason": exc.reason,
+                "detail": str(exc),
+                "count": count,
+            },
+        )
+
+    def capacity(self) -> int:
+        """
+        Requests this controller can hold at once, running plus queued. Each
+        holds a server thread, so this must stay below the pool size.
+        """
+        return sum(
+            limiter.limits.max_concurrency + limiter.limits.max_queue for limiter in self._limiters.values()
+        )
+
+    def rejection_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {f"{method}.{reason}": count for (method, reason), count in self._rejections.items()}
+
+    def summary(self) -> str:
+        counts = self.rejection_counts()
+        parts = [f"rejected={sum(counts.values())}"]
+        parts += [f"{name}={count}" for name, count in sorted(counts.items())]
+        return " ".join(parts)
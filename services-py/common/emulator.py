@@ -0,0 +1,277 @@
+"""
+Latency-faithful device emulation.
+
+With `EMULATOR=1` (and `DEVICE_MODE` unset) the engines use Emulated*
+clients instead of the fixed-sleep mocks. The clients draw latencies from a
+cost model (`EMULATOR_COST_MODEL`, default `cost_model.json` next to this
+file) and hold a shared device resource while "running", so concurrent
+requests queue exactly as they would on a single accelerator.
+
+Cost model layout:
+
+    {
+      "devices": {"ax8850": {"concurrency": 1}, ...},
+      "operations": {
+        "ax8850.decode": {
+          "device": "ax8850",
+          "unit": "token",
+          "base_ms": {"dist": "fixed", "value": 0},
+          "per_unit_ms": {"dist": "normal", "mean": 70, "std": 8}
+        },
+        ...
+      }
+    }
+
+An operation costs base_ms + units * per_unit_ms, each drawn from its
+distribution (fixed, normal, lognormal with median/sigma, or empirical
+samples). "defaults" holds sizes the emulated clients cannot derive from a
+request, such as the typical Generate reply length (capped by max_tokens).
+
+`EMULATOR_TIME_SCALE` multiplies every delay (e.g. 0.1 in CI) and
+`EMULATOR_SEED` makes runs repeatable. `bench.fit_costs` fits a model from
+traffic recorded on real hardware.
+"""
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+DEFAULT_COST_MODEL = str(Path(__file__).resolve().parent / "cost_model.json")
+
+
+@dataclass
+class Distribution:
+    kind: str = "fixed"
+    params: Dict[str, object] = field(default_factory=dict)
+
+    @classmethod
+    def parse(cls, spec) -> "Distribution":
+        if isinstance(spec, (int, float)):
+            return cls("fixed", {"value": float(spec)})
+        spec = dict(spec)
+        kind = spec.pop("dist", "fixed")
+        if kind not in ("fixed", "normal", "lognormal", "empirical"):
+            raise ValueError(f"Unknown distribution {kind!r}")
+        return cls(kind, spec)
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            value = float(p.get("value", 0.0))
+        elif self.kind == "normal":
+            value = rng.gauss(float(p["mean"]), float(p.get("std", 0.0)))
+        elif self.kind == "lognormal":
+            value = float(p["median"]) * math.exp(rng.gauss(0.0, float(p.get("sigma", 0.0))))
+        else:
+            value = rng.choice(p["samples"])
+        return max(0.0, value)
+
+    def to_json(self) -> Dict[str, object]:
+        return {"dist": self.kind, **self.params}
+
+
+@dataclass
+class Operation:
+    device: str
+    unit: str = ""
+    base_ms: Distribution = field(default_factory=Distribution)
+    per_unit_ms: Distribution = field(default_factory=Distribution)
+
+    def cost_ms(self, units: float, rng: random.Random) -> float:
+        cost = self.base_ms.sample(rng)
+        if units:
+            cost += units * self.per_unit_ms.sample(rng)
+        return cost
+
+
+class DeviceResource:
+    """
+    A FIFO resource with `concurrency` slots. Tracks queue wait and busy time.
+    """
+
+    def __init__(self, name: str, concurrency: int = 1):
+        self.name = name
+        self.concurrency = concurrency
+        self._cond = threading.Condition()
+        self._waiting: deque = deque()
+        self._busy = 0
+        self._busy_ms = 0.0
+        self._waits_ms: deque = deque(maxlen=1024)
+        self._counts: Counter = Counter()
+        self._created = time.monotonic()
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        ticket = object()
+        queued = time.monotonic()
+        with self._cond:
+            self._waiting.append(ticket)
+            while self._waiting[0] is not ticket or self._busy >= self.concurrency:
+                self._cond.wait()
+            self._waiting.popleft()
+            self._busy += 1
+            self._cond.notify_all()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            ended = time.monotonic()
+            with self._cond:
+                self._busy -= 1
+                self._busy_ms += (ended - started) * 1000.0
+                self._waits_ms.append((started - queued) * 1000.0)
+                self._counts["runs"] += 1
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            waits = sorted(self._waits_ms)
+            elapsed_ms = (time.monotonic() - self._created) * 1000.0
+            out: Dict[str, object] = {
+                "runs": self._counts["runs"],
+                "queued": len(self._waiting),
+                "util": round(self._busy_ms / max(elapsed_ms * self.concurrency, 1e-9), 3),
+            }
+            if waits:
+                out["wait_p50_ms"] = round(waits[len(waits) // 2], 1)
+                out["wait_p99_ms"] = round(waits[min(len(waits) - 1, int(len(waits) * 0.99))], 1)
+        return out
+
+
+class Emulator:
+    """
+    Cost model plus device resources for one process.
+    """
+
+    def __init__(self, model: dict, time_scale: float = 1.0, seed: Optional[int] = None):
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.devices: Dict[str, DeviceResource] = {
+            name: DeviceResource(name, int(spec.get("concurrency", 1)))
+            for name, spec in model.get("devices", {}).items()
+        }
+        self.operations: Dict[str, Operation] = {}
+        for name, spec in model.get("operations", {}).items():
+            self.operations[name] = Operation(
+                device=spec["device"],
+                unit=spec.get("unit", ""),
+                base_ms=Distribution.parse(spec.get("base_ms", 0)),
+                per_unit_ms=Distribution.parse(spec.get("per_unit_ms", 0)),
+            )
+            self.devices.setdefault(spec["device"], DeviceResource(spec["device"]))
+        self.defaults: Dict[str, float] = model.get("defaults", {})
+
+    @classmethod
+    def from_env(cls) -> "Emulator":
+        path = os.getenv("EMULATOR_COST_MODEL", DEFAULT_COST_MODEL)
+        with open(path, "r", encoding="utf-8") as handle:
+            model = json.load(handle)
+        seed = os.getenv("EMULATOR_SEED", "")
+        return cls(
+            model,
+            time_scale=float(os.getenv("EMULATOR_TIME_SCALE", "1.0")),
+            seed=int(seed) if seed else None,
+        )
+
+    def cost_ms(self, operation: str, units: float = 0.0) -> float:
+        with self._rng_lock:
+            return self.operations[operation].cost_ms(units, self._rng)
+
+    def sleep_ms(self, ms: float) -> None:
+        if ms > 0:
+            time.sleep(ms * self.time_scale / 1000.0)
+
+    @contextmanager
+    def device(self, operation: str) -> Iterator[None]:
+        with self.devices[self.operations[operation].device].hold():
+            yield
+
+    def run(self, operation: str, units: float = 0.0) -> float:
+        """
+        Occupies the operation's device for one sampled cost. Returns the
+        modeled cost in ms (before time scaling).
+        """
+        with self.device(operation):
+            cost = self.cost_ms(operation, units)
+            self.sleep_ms(cost)
+        return cost
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Flattened per-device stats for the devices this process has used.
+        """
+        out: Dict[str, object] = {}
+        for name, device in self.devices.items():
+            stats = device.stats()
+            if stats["runs"] or stats["queued"]:
+                out.update({f"{name}_{key}": value for key, value in stats.items()})
+        return out
+
+    def summary(self) -> str:
+        return " ".join(f"{name}={value}" for name, value in self.stats().items())
+
+
+_emulator: Optional[Emulator] = None
+_emulator_lock = threading.Lock()
+
+
+def get_emulator() -> Emulator:
+    global _emulator
+    with _emulator_lock:
+        if _emulator is None:
+            _emulator = Emulator.from_env()
+        return _emulator
+
+
+def fit_linear(units: List[float], latencies_ms: List[float]) -> Dict[str, object]:
+    """
+    Fits latency = base + units * per_unit by least squares and describes
+    the residual spread of the base as a lognormal (median absolute
+    deviation of the log, so a few noisy large requests do not dominate).
+    Returns an operation's `base_ms` / `per_unit_ms` entries.
+    """
+    n = len(latencies_ms)
+    if n == 0:
+        raise ValueError("No samples to fit")
+    mean_u = sum(units) / n
+    mean_l = sum(latencies_ms) / n
+    var_u = sum((u - mean_u) ** 2 for u in units)
+    per_unit = 0.0
+    if var_u > 0:
+        covariance = sum((u - mean_u) * (l - mean_l) for u, l in zip(units, latencies_ms))
+        per_unit = max(0.0, covariance / var_u)
+    bases = sorted(l - per_unit * u for u, l in zip(units, latencies_ms))
+    positive = [b for b in bases if b > 0] or [1e-3]
+    median = positive[len(positive) // 2]
+    deviations = sorted(abs(math.log(b / median)) for b in positive)
+    sigma = 1.4826 * deviations[len(deviations) // 2]
+    return {
+        "base_ms": {"dist": "lognormal", "median": round(median, 3), "sigma": round(sigma, 4)},
+        "per_unit_ms": {"dist": "fixed", "value": round(per_unit, 6)},
+        "samples": n,
+    }
+
+
+def fit_per_unit(per_unit_ms: List[float]) -> Dict[str, object]:
+    """
+    Describes directly observed per-unit costs (e.g. decode ms per token).
+    """
+    n = len(per_unit_ms)
+    if n == 0:
+        raise ValueError("No samples to fit")
+    mean = sum(per_unit_ms) / n
+    std = math.sqrt(sum((x - mean) ** 2 for x in per_unit_ms) / n)
+    return {
+        "base_ms": {"dist": "fixed", "value": 0},
+        "per_unit_ms": {"dist": "normal", "mean": round(mean, 3), "std": round(std, 3)},
+        "samples": n,
+    }
@@ -1,13 +1,124 @@
 import logging
+import os
 from concurrent import futures
+from typing import List, Optional, Sequence, Tuple
 
 import grpc
 
+from common.models import ServiceConfig
+from common.recorder import TrafficRecorder
 
-def serve(servicer, add_servicer, host: str, port: int, max_workers: int = 10):
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+
+ChannelOptions = List[Tuple[str, object]]
+
+
+def _transport_options(config: ServiceConfig) -> ChannelOptions:
+    options: ChannelOptions = [
+        ("grpc.max_send_message_length", config.max_message_bytes),
+        ("grpc.max_receive_message_length", config.max_message_bytes),
+        ("grpc.http2.bdp_probe", 1 if config.bdp_probe else 0),
+        ("grpc.keepalive_time_ms", config.keepalive_time_ms),
+        ("grpc.keepalive_timeout_ms", config.keepalive_timeout_ms),
+    ]
+    if config.flow_control_window_bytes > 0:
+        options.append(("grpc.http2.lookahead_bytes", config.flow_control_window_bytes))
+    return options
+
+
+def server_options(config: ServiceConfig) -> ChannelOptions:
+    options = _transport_options(config)
+    options += [
+        # Accept client keepalive pings at the interval we ask clients to use.
+        ("grpc.http2.min_ping_interval_without_data_ms", config.keepalive_time_ms),
+        ("grpc.keepalive_permit_without_calls", 1),
+    ]
+    return options
+
+
+def channel_options(config: ServiceConfig) -> ChannelOptions:
+    options = _transport_options(config)
+    options += [
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+    return options
+
+
+def target_for(config: ServiceConfig) -> str:
+    """
+    Returns the address a local client should dial, preferring the socket.
+    """
+    if config.uds_path:
+        return f"unix:{config.uds_path}"
+    return f"{config.host}:{config.port}"
+
+
+def insecure_channel(config: ServiceConfig) -> grpc.Channel:
+    return grpc.insecure_channel(target_for(config), options=channel_options(config))
+
+
+def _prepare_uds(path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # A stale socket left behind by a crashed process blocks the bind.
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def serve(
+    servicer,
+    add_servicer,
+    host: str,
+    port: int,
+    max_workers: int = 10,
+    uds_path: str = "",
+    options: Optional[Sequence[Tuple[str, object]]] = None,
+    interceptors: Optional[Sequence[grpc.ServerInterceptor]] = None,
+):
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=max_workers),
+        options=list(options or []),
+        interceptors=list(interceptors or []),
+    )
     add_servicer(servicer, server)
-    server.add_insecure_port(f"{host}:{port}")
+    if port > 0 or not uds_path:
+        server.add_insecure_port(f"{host}:{port}")
+    if uds_path:
+        _prepare_uds(uds_path)
+        server.add_insecure_port(f"unix:{uds_path}")
     server.start()
-    logging.info("grpc_server_started", extra={"host": host, "port": port})
+    logging.info(
+        "grpc_server_started",
+        extra={"host": host, "port": port, "uds_path": uds_path, "max_workers": max_workers},
+    )
     return server
+
+
+def serve_config(servicer, add_servicer, config: ServiceConfig):
+    admission = getattr(servicer, "admission", None)
+    if admission is not None and admission.capacity() >= config.max_workers:
+        logging.warning(
+            f"{admission.service} admission holds up to {admission.capacity()} requests but the server has "
+            f"{config.max_workers} threads; excess load will wait in gRPC's unbounded queue"
+        )
+    interceptors = []
+    if config.record_path:
+        interceptors.append(
+            TrafficRecorder(
+                config.record_path,
+                sample=config.record_sample,
+                redact_payloads=config.record_redact,
+                max_bytes=config.record_max_bytes,
+            )
+        )
+    return serve(
+        servicer,
+        add_servicer,
+        config.host,
+        config.port,
+        max_workers=config.max_workers,
+        uds_path=config.uds_path,
+        options=server_options(config),
+        interceptors=interceptors,
+    )
@@ -1,7 +1,81 @@
+import os
 from dataclasses import dataclass
 
 
+DEFAULT_MAX_MESSAGE_BYTES = 32 * 1024 * 1024
+
+
+def _env(prefix: str, name: str, default: str) -> str:
+    """
+    Reads `<PREFIX>_<NAME>`, falling back to the stack-wide `GRPC_<NAME>`.
+    """
+    value = os.getenv(f"{prefix}_{name}")
+    if value is None:
+        value = os.getenv(f"GRPC_{name}", default)
+    return value
+
+
+def _uds_path(prefix: str) -> str:
+    """
+    `<PREFIX>_UDS` names the socket directly; `GRPC_UDS_DIR` places every
+    service's socket at `<dir>/<prefix>.sock`.
+    """
+    path = os.getenv(f"{prefix}_UDS", "")
+    if not path and os.getenv("GRPC_UDS_DIR"):
+        path = os.path.join(os.environ["GRPC_UDS_DIR"], f"{prefix.lower()}.sock")
+    return path
+
+
+def _record_path(prefix: str) -> str:
+    """
+    `<PREFIX>_RECORD` names the traffic log directly; `GRPC_RECORD_DIR`
+    records every service to `<dir>/<prefix>.rec`.
+    """
+    path = os.getenv(f"{prefix}_RECORD", "")
+    if not path and os.getenv("GRPC_RECORD_DIR"):
+        path = os.path.join(os.environ["GRPC_RECORD_DIR"], f"{prefix.lower()}.rec")
+    return path
+
+
 @dataclass
 class ServiceConfig:
     host: str = "127.0.0.1"
     port: int = 0
+    # Unix domain socket path; when set the server also listens on `unix:<path>`.
+    # A port of 0 together with a socket path disables the TCP listener.
+    uds_path: str = ""
+    max_workers: int = 10
+    max_message_bytes: int = DEFAULT_MAX_MESSAGE_BYTES
+    # HTTP/2 stream lookahead window. 0 keeps the gRPC default.
+    flow_control_window_bytes: int = 0
+    bdp_probe: bool = True
+    keepalive_time_ms: int = 30000
+    keepalive_timeout_ms: int = 10000
+    # Traffic recording (see common/recorder.py); disabled when the path is empty.
+    record_path: str = ""
+    record_sample: float = 1.0
+    record_redact: bool = False
+    record_max_bytes: int = 256 * 1024 * 1024
+
+    @classmethod
+    def from_env(cls, prefix: str, default_port: int, default_workers: int = 10) -> "ServiceConfig":
+        """
+        Builds a config from `<PREFIX>_*` environment variables, e.g.
+        `VISION_HOST`, `VISION_PORT`, `VISION_UDS`, `VISION_MAX_WORKERS`.
+        Transport tuning can be set per service or for all services via `GRPC_*`.
+        """
+        return cls(
+            host=os.getenv(f"{prefix}_HOST", "127.0.0.1"),
+            port=int(os.getenv(f"{prefix}_PORT", str(default_port))),
+            uds_path=_uds_path(prefix),
+            max_workers=int(os.getenv(f"{prefix}_MAX_WORKERS", str(default_workers))),
+            max_message_bytes=int(_env(prefix, "MAX_MESSAGE_BYTES", str(DEFAULT_MAX_MESSAGE_BYTES))),
+            flow_control_window_bytes=int(_env(prefix, "FLOW_CONTROL_WINDOW_BYTES", "0")),
+            bdp_probe=_env(prefix, "BDP_PROBE", "1") == "1",
+            keepalive_time_ms=int(_env(prefix, "KEEPALIVE_TIME_MS", "30000")),
+            keepalive_timeout_ms=int(_env(prefix, "KEEPALIVE_TIMEOUT_MS", "10000")),
+            record_path=_record_path(prefix),
+            record_sample=float(_env(prefix, "RECORD_SAMPLE", "1.0")),
+            record_redact=_env(prefix, "RECORD_REDACT", "0") == "1",
+            record_max_bytes=int(_env(prefix, "RECORD_MAX_MB", "256")) * 1024 * 1024,
+        )
@@ -0,0 +1,308 @@
+"""
+Thermal and load pressure for adaptive quality.
+
+A Pi 5 running the LLM, vision and TTS together heats up and throttles, and
+latency then degrades without warning. PressureMonitor samples CPU
+temperature, clock and load average from sysfs/procfs and publishes a level
+that engines use to lower their cost (capture size, region caps, batch
+sizes, token limits):
+
+    NORMAL -> ELEVATED -> HIGH -> CRITICAL
+
+Levels rise as soon as a reading crosses an enter threshold. They fall one
+step at a time, and only after readings have stayed below the exit
+threshold (enter minus hysteresis) for `hold_s`. A busy CPU that is being
+throttled counts as at least HIGH. Throttling means the firmware reports
+under-voltage, a frequency cap or thermal throttling (Raspberry Pi
+`get_throttled`), or the kernel has capped `scaling_max_freq` below
+`cpuinfo_max_freq`. The current clock is not used: the ondemand governor
+idles a cool Pi 5 at 1.5 of 2.4 GHz.
+
+Environment:
+    PRESSURE_ROOT         filesystem root for sysfs/procfs (tests; default /)
+    PRESSURE_INTERVAL_S   sampling interval (default 2)
+    PRESSURE_TEMP_C       enter thresholds in C (default 65,72,80)
+    PRESSURE_LOAD         1-minute load per core thresholds (default 0.9,1.5,2.5)
+    PRESSURE_HOLD_S       seconds below exit thresholds before stepping down (default 15)
+    PRESSURE_LEVEL        force a level (normal|elevated|high|critical)
+    PRESSURE_ENABLED=0    disable sampling; the level stays NORMAL
+"""
+import glob
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Dict, Optional, Sequence, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class Level(IntEnum):
+    NORMAL = 0
+    ELEVATED = 1
+    HIGH = 2
+    CRITICAL = 3
+
+
+@dataclass
+class Reading:
+    temp_c: Optional[float] = None
+    # scaling_max_freq / cpuinfo_max_freq; below 1 when the clock is capped.
+    freq_cap_ratio: Optional[float] = None
+    # Firmware reports under-voltage, capping or throttling right now.
+    throttled: Optional[bool] = None
+    load_per_core: Optional[float] = None
+
+
+@dataclass
+class Thresholds:
+    # Enter thresholds for ELEVATED, HIGH and CRITICAL.
+    temp_c: Tuple[float, float, float] = (65.0, 72.0, 80.0)
+    load_per_core: Tuple[float, float, float] = (0.9, 1.5, 2.5)
+    temp_hysteresis_c: float = 5.0
+    load_hysteresis: float = 0.3
+    # A clock cap below this fraction of max while busy counts as throttled.
+    throttled_freq_ratio: float = 0.95
+    busy_load_per_core: float = 0.5
+    hold_s: float = 15.0
+
+
+def _floats(value: str, default: Tuple[float, float, float]) -> Tuple[float, float, float]:
+    if not value:
+        return default
+    parts = tuple(float(part) for part in value.split(","))
+    if len(parts) != 3:
+        raise ValueError(f"Expected three comma-separated thresholds, got {value!r}")
+    return parts
+
+
+# Raspberry Pi firmware get_throttled bits that describe the current state:
+# under-voltage, ARM frequency capped, throttled, soft temperature limit.
+THROTTLED_NOW_MASK = 0xF
+
+
+def _read_number(path: str) -> Optional[float]:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            return float(handle.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class SystemReader:
+    """
+    Reads the raw metrics below `root`, so tests can point it at a fake tree.
+    """
+
+    def __init__(self, root: str = "/"):
+        self.root = root
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    def cpu_count(self) -> int:
+        cpus = glob.glob(self._path("sys", "devices", "system", "cpu", "cpu[0-9]*"))
+        return len(cpus) or os.cpu_count() or 1
+
+    def read(self) -> Reading:
+        reading = Reading()
+        temps = [
+            _read_number(path)
+            for path in glob.glob(self._path("sys", "class", "thermal", "thermal_zone*", "temp"))
+        ]
+        temps = [temp for temp in temps if temp is not None]
+        if temps:
+            # Millidegrees Celsius.
+            reading.temp_c = max(temps) / 1000.0
+        cpufreq = self._path("sys", "devices", "system", "cpu", "cpu0", "cpufreq")
+        cap = _read_number(os.path.join(cpufreq, "scaling_max_freq"))
+        maximum = _read_number(os.path.join(cpufreq, "cpuinfo_max_freq"))
+        if cap and maximum:
+            reading.freq_cap_ratio = cap / maximum
+        reading.throttled = self._firmware_throttled()
+        load = _read_number(self._path("proc", "loadavg"))
+        if load is not None:
+            reading.load_per_core = load / self.cpu_count()
+        return reading
+
+    def _firmware_throttled(self) -> Optional[bool]:
+        paths = glob.glob(self._path("sys", "devices", "platform", "*firmware*", "get_throttled")) + glob.glob(
+            self._path("sys", "devices", "platform", "*", "*firmware*", "get_throttled")
+        )
+        for path in paths:
+            try:
+                with open(path, "r", encoding="utf-8") as handle:
+                    return bool(int(handle.read().strip(), 16) & THROTTLED_NOW_MASK)
+            except (OSError, ValueError):
+                continue
+        return None
+
+
+def _level_for(value: Optional[float], thresholds: Sequence[float], margin: float = 0.0) -> Level:
+    level = Level.NORMAL
+    if value is None:
+        return level
+    for index, threshold in enumerate(thresholds):
+        if value >= threshold - margin:
+            level = Level(index + 1)
+    return level
+
+
+class PressureMonitor:
+    def __init__(
+        self,
+        reader: Optional[SystemReader] = None,
+        thresholds: Optional[Thresholds] = None,
+        interval_s: float = 2.0,
+        forced: Optional[Level] = None,
+    ):
+        self.reader = reader or SystemReader()
+        self.thresholds = thresholds or Thresholds()
+        self.interval_s = interval_s
+        self.forced = forced
+        self._lock = threading.Lock()
+        self._level = forced if forced is not None else Level.NORMAL
+        self._below_since: Optional[float] = None
+        self._changed_at = time.monotonic()
+        self._time_at: Dict[Level, float] = {level: 0.0 for level in Level}
+        self._transitions: Counter = Counter()
+        self._reading = Reading()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "PressureMonitor":
+        defaults = Thresholds()
+        thresholds = Thresholds(
+            temp_c=_floats(os.getenv("PRESSURE_TEMP_C", ""), defaults.temp_c),
+            load_per_core=_floats(os.getenv("PRESSURE_LOAD", ""), defaults.load_per_core),
+            hold_s=float(os.getenv("PRESSURE_HOLD_S", str(defaults.hold_s))),
+        )
+        forced = os.getenv("PRESSURE_LEVEL", "")
+        return cls(
+            SystemReader(os.getenv("PRESSURE_ROOT", "/")),
+            thresholds,
+            interval_s=float(os.getenv("PRESSURE_INTERVAL_S", "2")),
+            forced=Level[forced.upper()] if forced else None,
+        )
+
+    @property
+    def level(self) -> Level:
+        return self._level
+
+    def pick(self, per_level: Sequence[T]) -> T:
+        """
+        Returns the entry of a 4-tuple (one value per level) for the current level.
+        """
+        return per_level[int(self._level)]
+
+    def _raw_levels(self, reading: Reading) -> Tuple[Level, Level]:
+        """
+        Returns (level by enter thresholds, level by exit thresholds).
+        """
+        t = self.thresholds
+        capped = reading.freq_cap_ratio is not None and reading.freq_cap_ratio < t.throttled_freq_ratio
+        busy = (reading.load_per_core or 0.0) >= t.busy_load_per_core
+        throttled = busy and (capped or bool(reading.throttled))
+        floor = Level.HIGH if throttled else Level.NORMAL
+        enter = max(
+            _level_for(reading.temp_c, t.temp_c),
+            _level_for(reading.load_per_core, t.load_per_core),
+            floor,
+        )
+        stay = max(
+            _level_for(reading.temp_c, t.temp_c, t.temp_hysteresis_c),
+            _level_for(reading.load_per_core, t.load_per_core, t.load_hysteresis),
+            floor,
+        )
+        return enter, stay
+
+    def update(self, reading: Reading, now: Optional[float] = None) -> Level:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._reading = reading
+            if self.forced is not None:
+                return self._level
+            enter, stay = self._raw_levels(reading)
+            if enter > self._level:
+                self._set(enter, now)
+            elif stay < self._level:
+                if self._below_since is None:
+                    self._below_since = now
+                elif now - self._below_since >= self.thresholds.hold_s:
+                    self._set(Level(self._level - 1), now)
+            else:
+                self._below_since = None
+            return self._level
+
+    def _set(self, level: Level, now: float) -> None:
+        self._time_at[self._level] += now - self._changed_at
+        logging.info(
+            f"Pressure {self._level.name} -> {level.name} "
+            f"(temp={self._reading.temp_c} load/core={self._reading.load_per_core} "
+            f"freq_cap={self._reading.freq_cap_ratio} throttled={self._reading.throttled})"
+        )
+        self._transitions[f"{self._level.name.lower()}->{level.name.lower()}"] += 1
+        self._level = level
+        self._changed_at = now
+        self._below_since = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.update(self.reader.read())
+            except Exception as exc:
+                logging.warning(f"Pressure sampling failed: {exc}")
+
+    def start(self) -> "PressureMonitor":
+        if self._thread is None:
+            self.update(self.reader.read())
+            self._thread = threading.Thread(target=self._run, name="pressure", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, object]:
+        now = time.monotonic()
+        with self._lock:
+            time_at = dict(self._time_at)
+            time_at[self._level] += now - self._changed_at
+            out: Dict[str, object] = {"level": self._level.name.lower()}
+            if self._reading.temp_c is not None:
+                out["temp_c"] = round(self._reading.temp_c, 1)
+            if self._reading.load_per_core is not None:
+                out["load_per_core"] = round(self._reading.load_per_core, 2)
+            if self._reading.freq_cap_ratio is not None:
+                out["freq_cap"] = round(self._reading.freq_cap_ratio, 2)
+            if self._reading.throttled is not None:
+                out["throttled"] = int(self._reading.throttled)
+            for level, seconds in time_at.items():
+                out[f"s_{level.name.lower()}"] = round(seconds, 1)
+            out["transitions"] = sum(self._transitions.values())
+        return out
+
+    def summary(self) -> str:
+        return " ".join(f"{name}={value}" for name, value in self.stats().items())
+
+
+_monitor: Optional[PressureMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def get_monitor() -> PressureMonitor:
+    """
+    Returns the process-wide monitor, starting it on first use.
+    """
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = PressureMonitor.from_env()
+            if os.getenv("PRESSURE_ENABLED", "1") != "0":
+                _monitor.start()
+        return _monitor
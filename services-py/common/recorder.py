@@ -0,0 +1,300 @@
+"""
+Opt-in traffic recorder for the gRPC services.
+
+When a service's config has `record_path` set, `serve_config` installs
+TrafficRecorder as a server interceptor. Every sampled call is appended to
+the log as one frame:
+
+    <u32 meta length><u32 request length><meta JSON><serialized request>
+
+The meta JSON holds the method, wall-clock start, latency, time to first
+message (streams), status code, remaining deadline and request/response
+sizes. It also notes work the call did not do on the device: calls a handler
+marked with `mark_cache_hit` and a response's `reused_lines` (incremental
+OCR), so cost fitting can leave them out. With `redact` enabled, bytes fields are stored as their length only
+and long free-text strings are replaced by placeholders of the same length,
+so a log can be shared without audio, images or student text.
+
+`bench.replay` sends a recorded session back to the services. Redacted
+fields are refilled on replay: audio with silence, images (an ImageBlob's
+`data`) with a blank page of the recorded size and format padded to the
+recorded length, so the services take their normal decode path. Anything
+that depends on image content (regions found, incremental OCR reuse) will
+differ from the original run.
+"""
+import io
+import json
+import logging
+import random
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional
+
+import grpc
+from google.protobuf.descriptor import FieldDescriptor
+
+
+FRAME_HEADER = struct.Struct("<II")
+# Strings up to this length (languages, ids, page types) are kept when redacting.
+REDACT_MIN_TEXT = 16
+# Trailing metadata a handler sets when it answered from a cache.
+CACHE_HIT_METADATA = ("x-cache", "hit")
+
+
+@dataclass
+class Record:
+    method: str
+    start: float
+    latency_ms: float
+    code: str
+    request: bytes
+    request_bytes: int
+    response_bytes: int
+    responses: int = 1
+    first_ms: Optional[float] = None
+    deadline_ms: Optional[float] = None
+    stream: bool = False
+    redacted: Dict[str, int] = field(default_factory=dict)
+    cache_hit: bool = False
+    reused: int = 0
+
+
+def mark_cache_hit(context) -> None:
+    """
+    Flags a call as served from a cache rather than the device.
+    """
+    context.set_trailing_metadata((CACHE_HIT_METADATA,))
+
+
+def redact(message) -> Dict[str, int]:
+    """
+    Clears bytes fields and masks long strings in place. Returns
+    {field path: original length} for the cleared bytes fields.
+    """
+    cleared: Dict[str, int] = {}
+    _redact(message, "", cleared)
+    return cleared
+
+
+def _redact(message, prefix: str, cleared: Dict[str, int]) -> None:
+    for descriptor, value in message.ListFields():
+        path = f"{prefix}{descriptor.name}"
+        repeated = descriptor.label == FieldDescriptor.LABEL_REPEATED
+        if descriptor.type == FieldDescriptor.TYPE_MESSAGE:
+            for index, item in enumerate(value if repeated else [value]):
+                _redact(item, f"{path}.{index}." if repeated else f"{path}.", cleared)
+        elif descriptor.type == FieldDescriptor.TYPE_BYTES and not repeated:
+            cleared[path] = len(value)
+            message.ClearField(descriptor.name)
+        elif descriptor.type == FieldDescriptor.TYPE_STRING:
+            if repeated:
+                masked = [_mask(item) for item in value]
+                del value[:]
+                value.extend(masked)
+            else:
+                setattr(message, descriptor.name, _mask(value))
+
+
+def _mask(text: str) -> str:
+    return text if len(text) <= REDACT_MIN_TEXT else "x" * len(text)
+
+
+def restore(message, cleared: Dict[str, int]) -> None:
+    """
+    Refills redacted bytes fields with placeholders of the recorded length:
+    a decodable blank image for image data, zeros (silence for PCM) otherwise.
+    """
+    for path, length in cleared.items():
+        target = message
+        parts = path.split(".")
+        for part in parts[:-1]:
+            target = target[int(part)] if part.isdigit() else getattr(target, part)
+        setattr(target, parts[-1], _placeholder(target, parts[-1], length))
+
+
+def _placeholder(message, name: str, length: int) -> bytes:
+    fields = message.DESCRIPTOR.fields_by_name
+    if name == "data" and "width" in fields and "height" in fields and message.width > 0 and message.height > 0:
+        fmt = "PNG" if "png" in getattr(message, "mime", "") else "JPEG"
+        image = _blank_image(message.width, message.height, fmt)
+        if image is not None:
+            # Decoders stop at the end-of-image marker, so padding keeps the size faithful.
+            return image + bytes(max(0, length - len(image)))
+    return bytes(length)
+
+
+@lru_cache(maxsize=8)
+def _blank_image(width: int, height: int, fmt: str) -> Optional[bytes]:
+    try:
+        from PIL import Image
+    except Exception:
+        logging.warning("Pillow not available; redacted images replay as zero bytes")
+        return None
+    out = io.BytesIO()
+    Image.new("L", (width, height), 235).save(out, fmt)
+    return out.getvalue()
+
+
+def read_records(path: str) -> Iterator[Record]:
+    with open(path, "rb") as handle:
+        while True:
+            header = handle.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            meta_len, request_len = FRAME_HEADER.unpack(header)
+            body = handle.read(meta_len + request_len)
+            if len(body) < meta_len + request_len:
+                # A frame cut short by a crash; everything before it is intact.
+                return
+            meta = json.loads(body[:meta_len])
+            yield Record(
+                method=meta["m"],
+                start=meta["t"],
+                latency_ms=meta["l"],
+                code=meta["c"],
+                request=body[meta_len:],
+                request_bytes=meta["q"],
+                response_bytes=meta["r"],
+                responses=meta.get("n", 1),
+                first_ms=meta.get("f"),
+                deadline_ms=meta.get("d"),
+                stream=bool(meta.get("s")),
+                redacted=meta.get("x", {}),
+                cache_hit=bool(meta.get("h")),
+                reused=meta.get("u", 0),
+            )
+
+
+class TrafficRecorder(grpc.ServerInterceptor):
+    def __init__(self, path: str, sample: float = 1.0, redact_payloads: bool = False, max_bytes: int = 0):
+        self.path = path
+        self.sample = sample
+        self.redact_payloads = redact_payloads
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._handle = open(path, "ab")
+        self._written = self._handle.tell()
+        self._full = False
+        logging.info(f"Recording gRPC traffic to {path} (sample={sample}, redact={redact_payloads})")
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or handler.request_streaming or self._full:
+            return handler
+        method = handler_call_details.method
+        if handler.response_streaming:
+            return grpc.unary_stream_rpc_method_handler(
+                self._wrap_stream(method, handler.unary_stream),
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer,
+            )
+        return grpc.unary_unary_rpc_method_handler(
+            self._wrap_unary(method, handler.unary_unary),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+
+    def _sampled(self) -> bool:
+        return self.sample >= 1.0 or random.random() < self.sample
+
+    def _wrap_unary(self, method: str, behavior):
+        def wrapper(request, context):
+            if not self._sampled():
+                return behavior(request, context)
+            started_at, deadline_ms, start = time.time(), _remaining_ms(context), time.perf_counter()
+            response = None
+            try:
+                response = behavior(request, context)
+                return response
+            finally:
+                latency_ms = (time.perf_counter() - start) * 1000.0
+                size = response.ByteSize() if response is not None else 0
+                reused = getattr(response, "reused_lines", 0)
+                self._write(
+                    method, request, context, started_at, latency_ms, deadline_ms, size, 1, None, False, reused
+                )
+
+        return wrapper
+
+    def _wrap_stream(self, method: str, behavior):
+        def wrapper(request, context):
+            if not self._sampled():
+                yield from behavior(request, context)
+                return
+            started_at, deadline_ms, start = time.time(), _remaining_ms(context), time.perf_counter()
+            size = count = 0
+            first_ms = None
+            try:
+                for response in behavior(request, context):
+                    if first_ms is None:
+                        first_ms = (time.perf_counter() - start) * 1000.0
+                    size += response.ByteSize()
+                    count += 1
+                    yield response
+            finally:
+                latency_ms = (time.perf_counter() - start) * 1000.0
+                self._write(method, request, context, started_at, latency_ms, deadline_ms, size, count, first_ms, True)
+
+        return wrapper
+
+    def _write(
+        self, method, request, context, started_at, latency_ms, deadline_ms, size, count, first_ms, stream, reused=0
+    ):
+        try:
+            request_bytes = request.ByteSize()
+            cleared: Dict[str, int] = {}
+            if self.redact_payloads:
+                copy = type(request)()
+                copy.CopyFrom(request)
+                cleared = redact(copy)
+                request = copy
+            payload = request.SerializeToString()
+            code = context.code() if hasattr(context, "code") else None
+            meta: Dict[str, Any] = {
+                "m": method,
+                "t": round(started_at, 6),
+                "l": round(latency_ms, 3),
+                "c": (code or grpc.StatusCode.OK).name,
+                "q": request_bytes,
+                "r": size,
+            }
+            if stream:
+                meta.update(s=1, n=count, f=round(first_ms, 3) if first_ms is not None else None)
+            if deadline_ms is not None:
+                meta["d"] = round(deadline_ms, 1)
+            if cleared:
+                meta["x"] = cleared
+            trailing = context.trailing_metadata() if hasattr(context, "trailing_metadata") else None
+            if trailing and CACHE_HIT_METADATA in tuple(trailing):
+                meta["h"] = 1
+            if reused:
+                meta["u"] = reused
+            encoded = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+            frame = FRAME_HEADER.pack(len(encoded), len(payload)) + encoded + payload
+            with self._lock:
+                if self._full:
+                    return
+                if self.max_bytes and self._written + len(frame) > self.max_bytes:
+                    self._full = True
+                    logging.warning(f"Traffic log {self.path} reached {self.max_bytes} bytes; recording stopped")
+                    return
+                self._handle.write(frame)
+                self._handle.flush()
+                self._written += len(frame)
+        except Exception as exc:
+            logging.warning(f"Failed to record {method}: {exc}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._handle.close()
+
+
+def _remaining_ms(context) -> Optional[float]:
+    remaining = context.time_remaining()
+    # gRPC reports a huge value when the client set no deadline.
+    if remaining is None or remaining > 1e6:
+        return None
+    return remaining * 1000.0
@@ -10,6 +10,10 @@ def is_device_mode() -> bool:
     return os.getenv("DEVICE_MODE", "0") == "1"
 
 
+def is_emulator_mode() -> bool:
+    return os.getenv("EMULATOR", "0") == "1"
+
+
 def read_wav(path: str) -> Tuple[bytes, int, int]:
     with open(path, "rb") as handle:
         data = handle.read()
@@ -0,0 +1,311 @@
+"""
+Process-isolated workers for CPU-bound engine stages.
+
+gRPC handlers run on threads of one interpreter, so pure-Python work
+(PCM generation, image decode, NMS) holds the GIL and stalls unrelated
+calls such as Health or a streaming Generate. A WorkerPool runs such stages
+in persistent worker processes instead:
+
+- workers are started once (spawn, so no gRPC state is forked) and run an
+  optional initializer whose return value is available as `worker_state()`
+- bytes and numpy arrays above `shm_threshold` travel through shared memory
+  in both directions rather than through the pipe
+- each call is pinned to one worker; if that worker crashes or times out it
+  is replaced and the call raises WorkerCrashed, other calls are unaffected
+- a replacement that fails to start `RESPAWN_ATTEMPTS` times drops its slot
+  and marks the pool degraded; once no slots are left calls fail fast
+
+With `workers=0` calls run inline on the calling thread.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import Counter
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+DEFAULT_SHM_THRESHOLD = 64 * 1024
+START_TIMEOUT_S = 30.0
+RESPAWN_ATTEMPTS = 3
+RESPAWN_BACKOFF_S = 1.0
+
+_state: Any = None
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class _ShmRef:
+    name: str
+    size: int
+    dtype: str = ""
+    shape: Tuple[int, ...] = ()
+
+
+def worker_state() -> Any:
+    """
+    Returns what the pool's initializer returned, inside a worker process.
+    """
+    return _state
+
+
+def _to_shm(value: Any, threshold: int, created: List[shared_memory.SharedMemory]) -> Any:
+    if isinstance(value, (bytes, bytearray, memoryview)) and len(value) >= threshold:
+        segment = shared_memory.SharedMemory(create=True, size=len(value))
+        segment.buf[: len(value)] = value
+        created.append(segment)
+        return _ShmRef(segment.name, len(value))
+    if isinstance(value, np.ndarray) and value.nbytes >= threshold:
+        segment = shared_memory.SharedMemory(create=True, size=value.nbytes)
+        np.ndarray(value.shape, dtype=value.dtype, buffer=segment.buf)[...] = value
+        created.append(segment)
+        return _ShmRef(segment.name, value.nbytes, value.dtype.str, value.shape)
+    if isinstance(value, tuple):
+        return tuple(_to_shm(item, threshold, created) for item in value)
+    return value
+
+
+def _from_shm(value: Any) -> Any:
+    if isinstance(value, _ShmRef):
+        segment = shared_memory.SharedMemory(name=value.name)
+        try:
+            if value.dtype:
+                return np.ndarray(value.shape, dtype=np.dtype(value.dtype), buffer=segment.buf).copy()
+            return bytes(segment.buf[: value.size])
+        finally:
+            segment.close()
+    if isinstance(value, tuple):
+        return tuple(_from_shm(item) for item in value)
+    return value
+
+
+def _release(value: Any) -> None:
+    """
+    Unlinks the segments referenced by a result the worker created.
+    """
+    if isinstance(value, _ShmRef):
+        try:
+            segment = shared_memory.SharedMemory(name=value.name)
+        except FileNotFoundError:
+            return
+        segment.close()
+        segment.unlink()
+    elif isinstance(value, tuple):
+        for item in value:
+            _release(item)
+
+
+def _worker_main(conn, initializer: Optional[Callable[..., Any]], initargs: tuple, threshold: int) -> None:
+    global _state
+    try:
+        _state = initializer(*initargs) if initializer is not None else None
+    except Exception:
+        conn.send(("init_error", traceback.format_exc()))
+        return
+    conn.send(("ready", os.getpid()))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        fn, args, kwargs = message
+        created: List[shared_memory.SharedMemory] = []
+        try:
+            result = fn(*_from_shm(args), **kwargs)
+            reply = ("ok", _to_shm(result, threshold, created))
+        except Exception as exc:
+            reply = ("error", (exc, traceback.format_exc()))
+        try:
+            conn.send(reply)
+        except Exception as exc:
+            # The exception or result did not pickle; report it as text.
+            conn.send(("error", (RuntimeError(f"{type(exc).__name__}: {exc}"), traceback.format_exc())))
+        for segment in created:
+            # The parent unlinks after copying the result out.
+            segment.close()
+
+
+class _Worker:
+    def __init__(self, pool: "WorkerPool", index: int):
+        self.index = index
+        self.conn, child_conn = pool._context.Pipe()
+        self.process = pool._context.Process(
+            target=_worker_main,
+            args=(child_conn, pool._initializer, pool._initargs, pool.shm_threshold),
+            name=f"{pool.name}-worker-{index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        if not self.conn.poll(START_TIMEOUT_S):
+            self.kill()
+            raise WorkerCrashed(f"{self.process.name} did not start within {START_TIMEOUT_S:.0f}s")
+        try:
+            status, detail = self.conn.recv()
+        except EOFError:
+            status, detail = "exited", f"exit code {self.process.exitcode}"
+        if status != "ready":
+            self.kill()
+            raise WorkerCrashed(f"{self.process.name} failed to initialize:\n{detail}")
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class WorkerPool:
+    """
+    A fixed set of persistent worker processes. `run` blocks the calling
+    thread (not the GIL) until a worker is free and has finished.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        initializer: Optional[Callable[..., Any]] = None,
+        initargs: tuple = (),
+        shm_threshold: int = DEFAULT_SHM_THRESHOLD,
+    ):
+        self.name = name
+        self.workers = workers
+        self.shm_threshold = shm_threshold
+        self._initializer = initializer
+        self._initargs = initargs
+        self._context = multiprocessing.get_context("spawn")
+        # None is a wake-up marker put once the last slot has been dropped.
+        self._idle: "queue.Queue[Optional[_Worker]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._closed = False
+        self._live = max(workers, 0)
+        self.degraded = False
+        if workers > 0:
+            for index in range(workers):
+                self._idle.put(_Worker(self, index))
+            logging.info(f"Started {workers} {name} worker processes")
+        elif initializer is not None:
+            # Inline mode still gets its preloaded state.
+            global _state
+            _state = initializer(*initargs)
+
+    @classmethod
+    def from_env(cls, prefix: str, default_workers: int = 1, **kwargs) -> "WorkerPool":
+        """
+        Reads `<PREFIX>_CPU_WORKERS`; 0 runs stages inline.
+        """
+        workers = int(os.getenv(f"{prefix}_CPU_WORKERS", str(default_workers)))
+        return cls(prefix.lower(), workers, **kwargs)
+
+    def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Calls module-level `fn(*args, **kwargs)` in a worker and returns its
+        result. Worker exceptions are re-raised here.
+        """
+        if self.workers <= 0:
+            return fn(*args, **kwargs)
+        if self._closed:
+            raise RuntimeError(f"{self.name} worker pool is closed")
+        worker = self._idle.get() if self._live > 0 else None
+        if worker is None:
+            self._idle.put(None)
+            self._count("rejected")
+            raise WorkerCrashed(f"{self.name} worker pool has no live workers")
+        created: List[shared_memory.SharedMemory] = []
+        replace = False
+        try:
+            worker.conn.send((fn, _to_shm(args, self.shm_threshold, created), kwargs))
+            if not worker.conn.poll(timeout):
+                replace = True
+                self._count("timeout")
+                raise WorkerCrashed(f"{worker.process.name} timed out after {timeout:.1f}s")
+            status, payload = worker.conn.recv()
+        except (EOFError, OSError) as exc:
+            replace = True
+            self._count("crashed")
+            worker.process.join(timeout=1.0)
+            raise WorkerCrashed(f"{worker.process.name} exited ({worker.process.exitcode})") from exc
+        finally:
+            for segment in created:
+                segment.close()
+                segment.unlink()
+            if replace:
+                self._replace(worker)
+            else:
+                self._idle.put(worker)
+        if status == "error":
+            self._count("error")
+            exc, trace = payload
+            logging.debug(f"{self.name} worker error:\n{trace}")
+            raise exc
+        self._count("ok")
+        try:
+            return _from_shm(payload)
+        finally:
+            _release(payload)
+
+    def _replace(self, worker: _Worker) -> None:
+        worker.kill()
+        if self._closed:
+            self._idle.put(worker)
+            return
+        logging.warning(f"Respawning {worker.process.name} (exit code {worker.process.exitcode})")
+        for attempt in range(RESPAWN_ATTEMPTS):
+            if attempt:
+                time.sleep(RESPAWN_BACKOFF_S)
+            try:
+                self._idle.put(_Worker(self, worker.index))
+                self._count("respawned")
+                return
+            except WorkerCrashed as exc:
+                logging.error(str(exc))
+        with self._lock:
+            self._counts["respawn_failed"] += 1
+            self._live -= 1
+            self.degraded = True
+            live = self._live
+        logging.error(
+            f"Dropped {worker.process.name} after {RESPAWN_ATTEMPTS} failed respawns; "
+            f"{live} of {self.workers} {self.name} workers left"
+        )
+        if live == 0:
+            self._idle.put(None)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._counts)
+            out["live"] = self._live
+        out["workers"] = self.workers
+        out["degraded"] = int(self.degraded)
+        return out
+
+    def close(self) -> None:
+        self._closed = True
+        for _ in range(self._live):
+            worker = self._idle.get()
+            if worker is None:
+                break
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(timeout=1)
+            worker.kill()
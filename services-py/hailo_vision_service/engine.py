@@ -2,6 +2,22 @@ from abc import ABC, abstractmethod
 from typing import List, Tuple
 import time
 
+from common.emulator import get_emulator
+
+
+# Canned results shared by the mock and emulated clients.
+MOCK_PAGE_TYPE = ("text", 0.93)
+MOCK_TEXT_REGIONS = [
+    (40, 60, 220, 40, 0.82),
+    (40, 120, 240, 40, 0.79),
+    (40, 180, 200, 40, 0.76),
+]
+MOCK_OCR_LINES = [
+    ("The sum of angles in a triangle is 180 degrees.", 0.88),
+    ("Check work on problem 3, step 2.", 0.62),
+    ("Answer: 42", 0.57),
+]
+
 
 class HailoVisionClient(ABC):
     @abstractmethod
@@ -43,25 +59,39 @@ class MockHailoVisionClient(HailoVisionClient):
     def classify_page(self, pixels: bytes, width: int, height: int) -> Tuple[str, float]:
         print(f"Mocking page classification for {width}x{height} image.")
         time.sleep(0.1)
-        return "text", 0.93
+        return MOCK_PAGE_TYPE
 
     def detect_text_regions(self, pixels: bytes, width: int, height: int) -> List[Tuple[int, int, int, int, float]]:
         print(f"Mocking text region detection for {width}x{height} image.")
         time.sleep(0.2)
-        return [
-            (40, 60, 220, 40, 0.82),
-            (40, 120, 240, 40, 0.79),
-            (40, 180, 200, 40, 0.76),
-        ]
+        return list(MOCK_TEXT_REGIONS)
 
     def ocr_regions(self, pixels: bytes, width: int, height: int, regions) -> List[Tuple[str, float, Tuple]]:
         print(f"Mocking OCR for {len(regions)} regions.")
         time.sleep(0.3)
-        return [
-            ("The sum of angles in a triangle is 180 degrees.", 0.88, regions[0]),
-            ("Check work on problem 3, step 2.", 0.62, regions[1]),
-            ("Answer: 42", 0.57, regions[2]),
-        ]
+        return [(text, conf, region) for (text, conf), region in zip(MOCK_OCR_LINES, regions)]
+
+
+class EmulatedHailoVisionClient(MockHailoVisionClient):
+    """
+    Mock outputs with Hailo timing from the emulator cost model. Classify,
+    detect and OCR all queue for the one accelerator; detection is priced per
+    megapixel and OCR per region.
+    """
+    def __init__(self):
+        self.emulator = get_emulator()
+
+    def classify_page(self, pixels: bytes, width: int, height: int) -> Tuple[str, float]:
+        self.emulator.run("hailo.classify")
+        return MOCK_PAGE_TYPE
+
+    def detect_text_regions(self, pixels: bytes, width: int, height: int) -> List[Tuple[int, int, int, int, float]]:
+        self.emulator.run("hailo.detect", width * height / 1e6)
+        return list(MOCK_TEXT_REGIONS)
+
+    def ocr_regions(self, pixels: bytes, width: int, height: int, regions) -> List[Tuple[str, float, Tuple]]:
+        self.emulator.run("hailo.ocr", len(regions))
+        return [(text, conf, region) for (text, conf), region in zip(MOCK_OCR_LINES, regions)]
 
 
 class SdkHailoVisionClient(HailoVisionClient):
@@ -97,17 +127,20 @@ class SdkHailoVisionClient(HailoVisionClient):
         print(f"MOCK-SDK: Simulating OCR for {len(regions)} regions.")
         time.sleep(0.3)
         # Only return OCR for the top two (text) regions
-        return [
-            ("How to calculate the area of a circle?", 0.91, regions[0]),
-            ("pi * r^2", 0.85, regions[1]),
+        canned = [
+            ("How to calculate the area of a circle?", 0.91),
+            ("pi * r^2", 0.85),
         ]
+        return [(text, conf, region) for (text, conf), region in zip(canned, regions)]
 
 
-def get_hailo_vision_client(device_mode: bool) -> HailoVisionClient:
+def get_hailo_vision_client(device_mode: bool, emulator_mode: bool = False) -> HailoVisionClient:
     """
     Factory function to get the appropriate HailoVision client based on the
-    `DEVICE_MODE` environment variable.
+    `DEVICE_MODE` and `EMULATOR` environment variables.
     """
     if device_mode:
         return SdkHailoVisionClient()
+    if emulator_mode:
+        return EmulatedHailoVisionClient()
     return MockHailoVisionClient()
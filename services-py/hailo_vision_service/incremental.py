@@ -0,0 +1,290 @@
+"""
+Tile-level incremental OCR between successive captures of one worksheet.
+
+Each capture is decoded to a small grayscale working image. The new capture
+is aligned to the previous one of the same session with phase correlation
+(sub-pixel translation only; the camera is fixed over the desk), then
+compared tile by tile using 8x8 thumbnails. A region is recognized again only if it touches
+a changed tile or has no matching cached line; otherwise the cached text is
+reused.
+"""
+import io
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+Box = Tuple[int, int, int, int, float]
+OcrLine = Tuple[str, float, Box]
+
+UNCHANGED = "unchanged"
+NEW = "new"
+CHANGED = "changed"
+
+# Width of the grayscale working image used for alignment and tile hashing.
+WORK_WIDTH = 320
+TILE = 16
+THUMB = 8
+# Mean absolute thumbnail difference (0-255) above which a tile counts as changed.
+TILE_DIFF_THRESHOLD = 10.0
+MATCH_IOU = 0.5
+
+
+def decode_gray(data: bytes, width: int = WORK_WIDTH) -> Tuple[np.ndarray, float]:
+    """
+    Decodes an encoded image to a float32 grayscale array at `width` pixels
+    wide. Returns (pixels, scale) where scale maps full-size to working
+    coordinates.
+    """
+    try:
+        from PIL import Image
+    except Exception as exc:
+        raise RuntimeError("Pillow not available") from exc
+    with Image.open(io.BytesIO(data)) as image:
+        gray = image.convert("L")
+        scale = min(1.0, width / float(max(1, gray.width)))
+        if scale < 1.0:
+            gray = gray.resize((max(1, int(gray.width * scale)), max(1, int(gray.height * scale))), Image.BILINEAR)
+        return np.asarray(gray, dtype=np.float32), scale
+
+
+def _peak_offset(before: float, peak: float, after: float) -> float:
+    curvature = before - 2.0 * peak + after
+    return 0.0 if curvature == 0 else 0.5 * (before - after) / curvature
+
+
+def phase_shift(previous: np.ndarray, current: np.ndarray) -> Tuple[float, float]:
+    """
+    Returns the sub-pixel (dy, dx) such that `current` shifted by (dy, dx)
+    lines up with `previous`.
+    """
+    window = np.outer(np.hanning(previous.shape[0]), np.hanning(previous.shape[1]))
+    f_prev = np.fft.fft2((previous - previous.mean()) * window)
+    f_cur = np.fft.fft2((current - current.mean()) * window)
+    cross = f_prev * np.conj(f_cur)
+    cross /= np.maximum(np.abs(cross), 1e-9)
+    response = np.fft.ifft2(cross).real
+    height, width = response.shape
+    py, px = np.unravel_index(int(np.argmax(response)), response.shape)
+    dy = py + _peak_offset(response[(py - 1) % height, px], response[py, px], response[(py + 1) % height, px])
+    dx = px + _peak_offset(response[py, (px - 1) % width], response[py, px], response[py, (px + 1) % width])
+    if dy > height / 2:
+        dy -= height
+    if dx > width / 2:
+        dx -= width
+    return float(dy), float(dx)
+
+
+def shift_image(gray: np.ndarray, dy: float, dx: float) -> np.ndarray:
+    """
+    Circularly shifts `gray` by a sub-pixel amount (Fourier shift theorem).
+    """
+    ky = np.fft.fftfreq(gray.shape[0])[:, None]
+    kx = np.fft.fftfreq(gray.shape[1])[None, :]
+    return np.fft.ifft2(np.fft.fft2(gray) * np.exp(-2j * np.pi * (ky * dy + kx * dx))).real
+
+
+def tile_thumbnails(gray: np.ndarray) -> np.ndarray:
+    """
+    Block-averages each TILE x TILE tile down to THUMB x THUMB. Returns an
+    array of shape (rows, cols, THUMB, THUMB); partial edge tiles are dropped.
+    """
+    rows, cols = gray.shape[0] // TILE, gray.shape[1] // TILE
+    step = TILE // THUMB
+    cropped = gray[: rows * TILE, : cols * TILE]
+    return cropped.reshape(rows, THUMB, step, cols, THUMB, step).mean(axis=(2, 5)).transpose(0, 2, 1, 3)
+
+
+def _wrap_mask(pixels: Tuple[int, int], tiles: Tuple[int, int], dy: float, dx: float) -> np.ndarray:
+    """
+    Marks tiles that the circular shift filled with wrapped-around content.
+    """
+    dy, dx = int(round(dy)), int(round(dx))
+    mask = np.zeros(tiles, dtype=bool)
+    if dy > 0:
+        mask[: -(-dy // TILE), :] = True
+    elif dy < 0:
+        mask[(pixels[0] + dy) // TILE :, :] = True
+    if dx > 0:
+        mask[:, : -(-dx // TILE)] = True
+    elif dx < 0:
+        mask[:, (pixels[1] + dx) // TILE :] = True
+    return mask
+
+
+def _iou(a: Box, b: Box) -> float:
+    ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+@dataclass
+class _Session:
+    shape: Tuple[int, int]
+    gray: np.ndarray
+    thumbs: np.ndarray
+    lines: List[OcrLine]
+    updated_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def nbytes(self) -> int:
+        return self.gray.nbytes + self.thumbs.nbytes + sum(len(text) for text, _, _ in self.lines)
+
+
+class IncrementalOcr:
+    """
+    Session store plus diffing. Sessions expire after `ttl_s`, and the
+    least recently used ones are evicted beyond `max_sessions` or
+    `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        ttl_s: float = 300.0,
+        max_sessions: int = 16,
+        max_bytes: int = 16 * 1024 * 1024,
+        decode: Callable[[bytes], Tuple[np.ndarray, float]] = decode_gray,
+    ):
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._decode = decode
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+
+    def _get(self, session_id: str, shape: Tuple[int, int]) -> Optional[_Session]:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None or session.shape != shape:
+                return None
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for session_id in [sid for sid, s in self._sessions.items() if now - s.updated_at > self.ttl_s]:
+            del self._sessions[session_id]
+
+    def _store(self, session_id: str, session: _Session) -> None:
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            total = sum(s.nbytes for s in self._sessions.values())
+            while self._sessions and (len(self._sessions) > self.max_sessions or total > self.max_bytes):
+                _, evicted = self._sessions.popitem(last=False)
+                total -= evicted.nbytes
+
+    def session_count(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._sessions)
+
+    def run(
+        self,
+        session_id: str,
+        data: bytes,
+        width: int,
+        height: int,
+        regions: Sequence[Box],
+        recognize: Callable[[List[Box]], List[OcrLine]],
+    ) -> Tuple[List[Tuple[str, float, Box, str]], int]:
+        """
+        Returns ([(text, confidence, region, change)], reused_count) in the
+        order of `regions`. An image that cannot be decoded gets a full pass
+        with every line reported as NEW; the session keeps its last good capture.
+        """
+        try:
+            gray, scale = self._decode(data)
+        except Exception as exc:
+            logging.warning(f"Incremental OCR session={session_id}: cannot decode image ({exc}); full pass")
+            recognized = recognize(list(regions)) if regions else []
+            return [(text, conf, region, NEW) for text, conf, region in recognized], 0
+        if width:
+            # Regions are in the ImageBlob's coordinate space.
+            scale = gray.shape[1] / float(width)
+        thumbs = tile_thumbnails(gray)
+        previous = self._get(session_id, (width, height))
+
+        dy = dx = 0.0
+        changed_tiles: Optional[np.ndarray] = None
+        if previous is not None and previous.gray.shape == gray.shape and thumbs.size:
+            dy, dx = phase_shift(previous.gray, gray)
+            aligned = tile_thumbnails(shift_image(gray, dy, dx))
+            diff = np.abs(aligned - previous.thumbs).mean(axis=(2, 3))
+            changed_tiles = diff > TILE_DIFF_THRESHOLD
+            changed_tiles |= _wrap_mask(gray.shape, changed_tiles.shape, dy, dx)
+
+        # Translation in full-size pixels, new capture -> previous capture.
+        full_dx = int(round(dx / scale))
+        full_dy = int(round(dy / scale))
+        statuses: List[str] = []
+        results: List[Optional[Tuple[str, float, Box]]] = []
+        to_recognize: List[Box] = []
+        for region in regions:
+            matched = None
+            if previous is not None:
+                moved = (region[0] + full_dx, region[1] + full_dy, region[2], region[3], region[4])
+                best = max(previous.lines, key=lambda line: _iou(moved, line[2]), default=None)
+                if best is not None and _iou(moved, best[2]) >= MATCH_IOU:
+                    matched = best
+            if matched is not None and changed_tiles is not None and not self._touches_change(
+                region, scale, dy, dx, changed_tiles
+            ):
+                results.append((matched[0], matched[1], region))
+                statuses.append(UNCHANGED)
+            else:
+                results.append(None)
+                statuses.append(CHANGED if matched is not None else NEW)
+                to_recognize.append(region)
+
+        reused = len(regions) - len(to_recognize)
+        recognized = {tuple(line[2]): line for line in recognize(to_recognize)} if to_recognize else {}
+        lines: List[Tuple[str, float, Box, str]] = []
+        for region, cached, status in zip(regions, results, statuses):
+            if cached is not None:
+                lines.append((cached[0], cached[1], region, status))
+                continue
+            line = recognized.get(tuple(region))
+            if line is None:
+                continue
+            if status == CHANGED and previous is not None:
+                moved = (region[0] + full_dx, region[1] + full_dy, region[2], region[3], region[4])
+                before = max(previous.lines, key=lambda prev: _iou(moved, prev[2]))
+                if before[0] == line[0]:
+                    status = UNCHANGED
+            lines.append((line[0], line[1], region, status))
+
+        self._store(
+            session_id,
+            _Session(
+                shape=(width, height),
+                gray=gray,
+                thumbs=thumbs,
+                lines=[(text, conf, region) for text, conf, region, _ in lines],
+            ),
+        )
+        logging.info(
+            f"Incremental OCR session={session_id} shift=({dx:.1f},{dy:.1f}) "
+            f"recognized={len(to_recognize)} reused={reused}"
+        )
+        return lines, reused
+
+    @staticmethod
+    def _touches_change(region: Box, scale: float, dy: float, dx: float, changed: np.ndarray) -> bool:
+        rows, cols = changed.shape
+        x1 = int((region[0] * scale + dx) // TILE)
+        y1 = int((region[1] * scale + dy) // TILE)
+        x2 = int(((region[0] + region[2]) * scale + dx) // TILE)
+        y2 = int(((region[1] + region[3]) * scale + dy) // TILE)
+        if x2 < 0 or y2 < 0 or x1 >= cols or y1 >= rows:
+            # Outside the tiled area (edge remainder); nothing to compare against.
+            return True
+        return bool(changed[max(0, y1) : min(rows, y2 + 1), max(0, x1) : min(cols, x2 + 1)].any())
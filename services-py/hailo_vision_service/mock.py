@@ -14,8 +14,9 @@ def mock_detect_text_regions(pixels: bytes, width: int, height: int):
 
 
 def mock_ocr(pixels: bytes, width: int, height: int, regions):
-    return [
-        ("The sum of angles in a triangle is 180 degrees.", 0.88, regions[0]),
-        ("Check work on problem 3, step 2.", 0.62, regions[1]),
-        ("Answer: 42", 0.57, regions[2]),
+    canned = [
+        ("The sum of angles in a triangle is 180 degrees.", 0.88),
+        ("Check work on problem 3, step 2.", 0.62),
+        ("Answer: 42", 0.57),
     ]
+    return [(text, conf, region) for (text, conf), region in zip(canned, regions)]
@@ -0,0 +1,310 @@
+"""
+Post-processing for raw text-detector output.
+
+Turns hundreds of overlapping word boxes into a short, reading-ordered list
+of line regions for OCR:
+
+1. drop boxes under the confidence/min-area floor
+2. greedy non-maximum suppression, IoU vectorized against all remaining boxes
+3. link word boxes into lines and lines into blocks; candidate pairs come
+   from a uniform grid so linking stays near-linear in the number of boxes
+4. order blocks with a recursive XY-cut (columns before rows) and lines
+   top-to-bottom within each block
+5. cap the number of regions, keeping the most confident/largest ones
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+import os
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+Box = Tuple[int, int, int, int, float]
+
+
+@dataclass
+class PostprocessConfig:
+    nms_iou: float = 0.5
+    min_confidence: float = 0.3
+    min_area: int = 64
+    max_regions: int = 64
+    # "line" merges words into lines; "block" returns whole blocks; "none" only runs NMS.
+    merge_level: str = "line"
+    # Horizontal gap between words on one line, in multiples of line height.
+    word_gap: float = 1.2
+    # Vertical gap between lines of one block, in multiples of line height.
+    line_gap: float = 0.8
+
+    @classmethod
+    def from_env(cls) -> "PostprocessConfig":
+        return cls(
+            nms_iou=float(os.getenv("VISION_NMS_IOU", "0.5")),
+            min_confidence=float(os.getenv("VISION_MIN_REGION_CONFIDENCE", "0.3")),
+            min_area=int(os.getenv("VISION_MIN_REGION_AREA", "64")),
+            max_regions=int(os.getenv("VISION_MAX_REGIONS", "64")),
+            merge_level=os.getenv("VISION_MERGE_LEVEL", "line"),
+        )
+
+
+def _as_array(regions: Sequence[Box]) -> np.ndarray:
+    """
+    Converts (x, y, w, h, conf) tuples to an (N, 5) float array of
+    (x1, y1, x2, y2, conf).
+    """
+    if not regions:
+        return np.zeros((0, 5), dtype=np.float32)
+    arr = np.asarray(regions, dtype=np.float32).reshape(-1, 5)
+    out = arr.copy()
+    out[:, 2] = arr[:, 0] + arr[:, 2]
+    out[:, 3] = arr[:, 1] + arr[:, 3]
+    return out
+
+
+def _as_regions(boxes: np.ndarray) -> List[Box]:
+    return [
+        (int(round(x1)), int(round(y1)), int(round(x2 - x1)), int(round(y2 - y1)), float(conf))
+        for x1, y1, x2, y2, conf in boxes
+    ]
+
+
+def _grid_pairs(boxes: np.ndarray, cell: float, pad_x: float, pad_y: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Candidate pairs (i < j) whose padded extents share a grid cell.
+    """
+    count = len(boxes)
+    cx1 = np.floor((boxes[:, 0] - pad_x) / cell).astype(np.int64)
+    cx2 = np.floor((boxes[:, 2] + pad_x) / cell).astype(np.int64)
+    cy1 = np.floor((boxes[:, 1] - pad_y) / cell).astype(np.int64)
+    cy2 = np.floor((boxes[:, 3] + pad_y) / cell).astype(np.int64)
+    span_y = cy2 - cy1 + 1
+    cells = (cx2 - cx1 + 1) * span_y
+
+    # One entry per (box, covered cell).
+    owner = np.repeat(np.arange(count), cells)
+    local = np.arange(owner.size) - np.repeat(np.cumsum(cells) - cells, cells)
+    gx = cx1[owner] + local // span_y[owner]
+    gy = cy1[owner] + local % span_y[owner]
+    key = (gx - gx.min()) * (int(gy.max() - gy.min()) + 1) + (gy - gy.min())
+    order = np.lexsort((owner, key))
+    key, owner = key[order], owner[order]
+
+    # Entries of one cell are contiguous; pair each with the ones d slots later.
+    left, right = [], []
+    offset = 1
+    while offset < key.size:
+        same = key[:-offset] == key[offset:]
+        if not same.any():
+            break
+        left.append(owner[:-offset][same])
+        right.append(owner[offset:][same])
+        offset += 1
+    if not left:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    a = np.concatenate(left)
+    b = np.concatenate(right)
+    pair_keys = np.unique(np.minimum(a, b) * count + np.maximum(a, b))
+    return pair_keys // count, pair_keys % count
+
+
+def _pair_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    iw = np.maximum(0.0, np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]))
+    ih = np.maximum(0.0, np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]))
+    inter = iw * ih
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+def nms(boxes: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Greedy NMS. Returns indices of kept boxes, highest confidence first.
+
+    IoU is computed in one vectorized pass over grid-neighbour pairs, so the
+    sequential part only walks each box's short overlap list.
+    """
+    count = len(boxes)
+    if count == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.argsort(-boxes[:, 4], kind="stable")
+    rank = np.empty(count, dtype=np.int64)
+    rank[order] = np.arange(count)
+
+    cell = max(1.0, float(np.median(boxes[:, 3] - boxes[:, 1])) * 2.0)
+    left, right = _grid_pairs(boxes, cell, 0.0, 0.0)
+    overlapping = _pair_iou(boxes[left], boxes[right]) > iou_threshold
+    left, right = left[overlapping], right[overlapping]
+    winner = np.where(rank[left] < rank[right], left, right)
+    loser = np.where(rank[left] < rank[right], right, left)
+    by_winner = np.argsort(winner, kind="stable")
+    winner, loser = winner[by_winner], loser[by_winner]
+    bounds = np.searchsorted(winner, np.arange(count + 1))
+
+    suppressed = np.zeros(count, dtype=bool)
+    keep = []
+    for i in order.tolist():
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed[loser[bounds[i] : bounds[i + 1]]] = True
+    return np.asarray(keep, dtype=np.int64)
+
+
+def _components(count: int, left: np.ndarray, right: np.ndarray) -> List[List[int]]:
+    parent = list(range(count))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in zip(left.tolist(), right.tolist()):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for i in range(count):
+        groups[find(i)].append(i)
+    return list(groups.values())
+
+
+def _link(
+    boxes: np.ndarray,
+    pad_x: float,
+    pad_y: float,
+    predicate: Callable[[np.ndarray, np.ndarray], np.ndarray],
+) -> List[List[int]]:
+    if len(boxes) == 0:
+        return []
+    cell = max(1.0, float(np.median(boxes[:, 3] - boxes[:, 1])) * 4.0)
+    left, right = _grid_pairs(boxes, cell, pad_x, pad_y)
+    if left.size:
+        linked = predicate(boxes[left], boxes[right])
+        left, right = left[linked], right[linked]
+    return _components(len(boxes), left, right)
+
+
+def _same_line(word_gap: float) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+    def predicate(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        ha = a[:, 3] - a[:, 1]
+        hb = b[:, 3] - b[:, 1]
+        v_overlap = np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1])
+        h_gap = np.maximum(a[:, 0], b[:, 0]) - np.minimum(a[:, 2], b[:, 2])
+        height = np.minimum(ha, hb)
+        return (v_overlap >= 0.5 * height) & (h_gap <= word_gap * np.maximum(ha, hb))
+
+    return predicate
+
+
+def _same_block(line_gap: float) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+    def predicate(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        ha = a[:, 3] - a[:, 1]
+        hb = b[:, 3] - b[:, 1]
+        h_overlap = np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0])
+        narrower = np.minimum(a[:, 2] - a[:, 0], b[:, 2] - b[:, 0])
+        v_gap = np.maximum(a[:, 1], b[:, 1]) - np.minimum(a[:, 3], b[:, 3])
+        similar_height = np.maximum(ha, hb) <= 2.0 * np.minimum(ha, hb)
+        return (h_overlap >= 0.3 * narrower) & (v_gap <= line_gap * np.maximum(ha, hb)) & similar_height
+
+    return predicate
+
+
+def _union(boxes: np.ndarray, groups: List[List[int]]) -> np.ndarray:
+    out = np.zeros((len(groups), 5), dtype=np.float32)
+    for row, members in enumerate(groups):
+        group = boxes[members]
+        out[row, 0] = group[:, 0].min()
+        out[row, 1] = group[:, 1].min()
+        out[row, 2] = group[:, 2].max()
+        out[row, 3] = group[:, 3].max()
+        out[row, 4] = group[:, 4].mean()
+    return out
+
+
+def _gaps(subset: np.ndarray, lo: int, hi: int) -> List[np.ndarray]:
+    """
+    Splits a box set at whitespace gaps along one axis (lo/hi are the
+    min/max coordinate columns). Returns positions into `subset`.
+    """
+    order = np.argsort(subset[:, lo], kind="stable")
+    reach = np.maximum.accumulate(subset[order, hi])
+    gaps = np.nonzero(subset[order[1:], lo] > reach[:-1])[0]
+    return np.split(order, gaps + 1)
+
+
+def _xy_cut(boxes: np.ndarray, indices: np.ndarray) -> List[int]:
+    """
+    Recursive XY-cut, column-aware. Columns are split at vertical gutters
+    first. When something spans the gutters (a title, a full-width
+    instruction) the set is cut into rows, and consecutive multi-column rows
+    are regrouped so each column is still read top to bottom.
+    """
+    if len(indices) <= 1:
+        return indices.tolist()
+    subset = boxes[indices]
+    columns = _gaps(subset, 0, 2)
+    if len(columns) > 1:
+        return [i for part in columns for i in _xy_cut(boxes, indices[part])]
+    rows = _gaps(subset, 1, 3)
+    if len(rows) == 1:
+        order = np.lexsort((subset[:, 0], subset[:, 1]))
+        return indices[order].tolist()
+
+    groups: List[np.ndarray] = []
+    run: List[np.ndarray] = []
+    for row in rows:
+        if len(_gaps(subset[row], 0, 2)) > 1:
+            run.append(row)
+            continue
+        if run:
+            groups.append(np.concatenate(run))
+            run = []
+        groups.append(row)
+    if run:
+        groups.append(np.concatenate(run))
+    if len(groups) == 1:
+        # Rows have columns but the gutters do not line up; read row by row.
+        groups = rows
+    return [i for group in groups for i in _xy_cut(boxes, indices[group])]
+
+
+def postprocess_regions(regions: Sequence[Box], config: PostprocessConfig) -> List[Box]:
+    boxes = _as_array(regions)
+    if len(boxes) == 0:
+        return []
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    boxes = boxes[(boxes[:, 4] >= config.min_confidence) & (areas >= config.min_area)]
+    boxes = boxes[nms(boxes, config.nms_iou)]
+    if config.merge_level == "none" or len(boxes) == 0:
+        ordered = boxes[_xy_cut(boxes, np.arange(len(boxes)))] if len(boxes) else boxes
+        return _as_regions(_cap(ordered, config.max_regions))
+
+    median_h = float(np.median(boxes[:, 3] - boxes[:, 1]))
+    lines = _union(boxes, _link(boxes, config.word_gap * median_h, 0.0, _same_line(config.word_gap)))
+    block_groups = _link(lines, 0.0, config.line_gap * median_h, _same_block(config.line_gap))
+    blocks = _union(lines, block_groups)
+    block_order = _xy_cut(blocks, np.arange(len(blocks)))
+
+    if config.merge_level == "block":
+        return _as_regions(_cap(blocks[block_order], config.max_regions))
+
+    ordered_lines: List[int] = []
+    for block in block_order:
+        members = np.asarray(block_groups[block], dtype=np.int64)
+        member_boxes = lines[members]
+        ordered_lines.extend(members[np.lexsort((member_boxes[:, 0], member_boxes[:, 1]))].tolist())
+    return _as_regions(_cap(lines[ordered_lines], config.max_regions))
+
+
+def _cap(ordered: np.ndarray, max_regions: int) -> np.ndarray:
+    """
+    Keeps the `max_regions` highest-scoring boxes (confidence x area) while
+    preserving reading order.
+    """
+    if max_regions <= 0 or len(ordered) <= max_regions:
+        return ordered
+    score = ordered[:, 4] * (ordered[:, 2] - ordered[:, 0]) * (ordered[:, 3] - ordered[:, 1])
+    keep = np.sort(np.argsort(-score, kind="stable")[:max_regions])
+    return ordered[keep]
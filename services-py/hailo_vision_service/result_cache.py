@@ -0,0 +1,53 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class ResultCache:
+    """
+    Small TTL + LRU cache of engine results keyed by image content.
+
+    Lets a speculative prefetch (see CameraService.PrepareCapture) compute
+    results ahead of the orchestrator's identical follow-up requests.
+    """
+
+    def __init__(self, ttl_s: float, max_entries: int = 32):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._counts: Counter = Counter()
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def get(self, method: str, digest: str, extra: Hashable = None, record: bool = True) -> Optional[Any]:
+        if self.ttl_s <= 0:
+            return None
+        key = (method, digest, extra)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_s:
+                self._entries.pop(key, None)
+                if record:
+                    self._counts[f"{method}.miss"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts[f"{method}.hit"] += 1
+            return entry[1]
+
+    def put(self, method: str, digest: str, value: Any, extra: Hashable = None) -> None:
+        if self.ttl_s <= 0:
+            return
+        with self._lock:
+            self._entries[(method, digest, extra)] = (time.monotonic(), value)
+            self._entries.move_to_end((method, digest, extra))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
@@ -1,4 +1,5 @@
 import logging
+import dataclasses
 import os
 import sys
 from pathlib import Path
@@ -9,31 +10,119 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 sys.path.append(str(Path(__file__).resolve().parents[1] / "common" / "gen"))
 
 from common import utils
-from common.grpc_server import serve
+from common.admission import AdmissionController, MethodLimits, Rejected
+from common.grpc_server import serve_config
 from common.models import ServiceConfig
+from common.pressure import get_monitor
+from common.recorder import mark_cache_hit
+from common.workers import WorkerPool
 
 import assistant_pb2
 import assistant_pb2_grpc
 
 from .engine import get_hailo_vision_client
+from .incremental import CHANGED, NEW, UNCHANGED, IncrementalOcr, decode_gray
+from .postprocess import PostprocessConfig, postprocess_regions
+from .result_cache import ResultCache
+
+
+# Defaults for admission control; override with VISION_<METHOD>_CONCURRENCY/_QUEUE.
+# Running plus queued stays below VISION_MAX_WORKERS so Health always gets a thread.
+ADMISSION_LIMITS = {
+    "ClassifyPage": MethodLimits(max_concurrency=1, max_queue=2),
+    "DetectTextRegions": MethodLimits(max_concurrency=1, max_queue=2),
+    "Ocr": MethodLimits(max_concurrency=1, max_queue=2),
+}
+
+# Region cap per pressure level (NORMAL, ELEVATED, HIGH, CRITICAL); 0 keeps VISION_MAX_REGIONS.
+PRESSURE_MAX_REGIONS = (0, 48, 32, 16)
+
+LINE_CHANGE = {
+    UNCHANGED: assistant_pb2.OcrLine.UNCHANGED,
+    NEW: assistant_pb2.OcrLine.NEW,
+    CHANGED: assistant_pb2.OcrLine.CHANGED,
+}
 
 
 class VisionService(assistant_pb2_grpc.VisionServiceServicer):
     def __init__(self):
-        self.vision_client = get_hailo_vision_client(utils.is_device_mode())
+        self.vision_client = get_hailo_vision_client(utils.is_device_mode(), utils.is_emulator_mode())
+        self.admission = AdmissionController.from_env("VISION", ADMISSION_LIMITS)
+        self.postprocess = PostprocessConfig.from_env()
+        self.pressure = get_monitor()
+        # Image decode and region post-processing run off the gRPC threads.
+        self.workers = WorkerPool.from_env("VISION", default_workers=1)
+        self.results = ResultCache(int(os.getenv("VISION_RESULT_CACHE_TTL_MS", "10000")) / 1000.0)
+        self.incremental = IncrementalOcr(
+            ttl_s=float(os.getenv("VISION_OCR_SESSION_TTL_S", "300")),
+            max_sessions=int(os.getenv("VISION_OCR_MAX_SESSIONS", "16")),
+            decode=lambda data: self.workers.run(decode_gray, data),
+        )
         logging.info(f"Initialized VisionService with client: {self.vision_client.__class__.__name__}")
 
+    def _run_cached(self, method: str, context, data: bytes, compute, extra=None):
+        digest = self.results.digest(data)
+        result = self.results.get(method, digest, extra)
+        if result is None:
+            with self.admission.admit(method, context):
+                # A prefetch for the same frame may have finished while we queued.
+                result = self.results.get(method, digest, extra, record=False)
+                if result is None:
+                    result = compute()
+                    self.results.put(method, digest, result, extra)
+                    return result
+        mark_cache_hit(context)
+        return result
+
+    def _detect_text_regions(self, request):
+        raw = self.vision_client.detect_text_regions(request.data, request.width, request.height)
+        config = self.postprocess
+        cap = self.pressure.pick(PRESSURE_MAX_REGIONS)
+        if cap and (config.max_regions <= 0 or cap < config.max_regions):
+            config = dataclasses.replace(config, max_regions=cap)
+        regions = self.workers.run(postprocess_regions, raw, config)
+        logging.info(f"DetectTextRegions: {len(raw)} raw boxes -> {len(regions)} regions")
+        return regions
+
+    def _incremental_ocr(self, request, context, regions):
+        image = request.image
+        with self.admission.admit("Ocr", context):
+            return self.incremental.run(
+                request.session_id,
+                image.data,
+                image.width,
+                image.height,
+                regions,
+                lambda subset: self.vision_client.ocr_regions(image.data, image.width, image.height, subset),
+            )
+
     def Health(self, request, context):
-        return assistant_pb2.HealthResponse(ok=True, message="ok")
+        stats = " ".join(f"{name}={value}" for name, value in sorted(self.results.stats().items()))
+        workers = " ".join(f"{name}={value}" for name, value in sorted(self.workers.stats().items()))
+        message = (
+            f"ok cache: {stats} ocr_sessions={self.incremental.session_count()} "
+            f"workers: {workers} admission: {self.admission.summary()} pressure: {self.pressure.summary()}"
+        )
+        emulator = getattr(self.vision_client, "emulator", None)
+        if emulator is not None:
+            message += f" emulator: {emulator.summary()}"
+        return assistant_pb2.HealthResponse(ok=True, message=message)
 
     def ClassifyPage(self, request, context):
         try:
-            page_type, confidence = self.vision_client.classify_page(
-                request.data, request.width, request.height
+            page_type, confidence = self._run_cached(
+                "ClassifyPage",
+                context,
+                request.data,
+                lambda: self.vision_client.classify_page(request.data, request.width, request.height),
             )
             return assistant_pb2.PageTypeResult(
                 page_type=page_type, confidence=confidence
             )
+        except Rejected as exc:
+            context.set_details(str(exc))
+            context.set_code(exc.code)
+            return assistant_pb2.PageTypeResult()
         except Exception as exc:
             logging.error(f"ClassifyPage failed: {exc}", exc_info=True)
             context.set_details(str(exc))
@@ -42,8 +131,11 @@ class VisionService(assistant_pb2_grpc.VisionServiceServicer):
 
     def DetectTextRegions(self, request, context):
         try:
-            regions = self.vision_client.detect_text_regions(
-                request.data, request.width, request.height
+            regions = self._run_cached(
+                "DetectTextRegions",
+                context,
+                request.data,
+                lambda: self._detect_text_regions(request),
             )
             return assistant_pb2.Regions(
                 regions=[
@@ -53,6 +145,10 @@ class VisionService(assistant_pb2_grpc.VisionServiceServicer):
                     for x, y, w, h, conf in regions
                 ]
             )
+        except Rejected as exc:
+            context.set_details(str(exc))
+            context.set_code(exc.code)
+            return assistant_pb2.Regions()
         except Exception as exc:
             logging.error(f"DetectTextRegions failed: {exc}", exc_info=True)
             context.set_details(str(exc))
@@ -65,9 +161,20 @@ class VisionService(assistant_pb2_grpc.VisionServiceServicer):
                 (r.x, r.y, r.w, r.h, r.confidence)
                 for r in request.regions.regions
             ]
-            lines = self.vision_client.ocr_regions(
-                request.image.data, request.image.width, request.image.height, regions
-            )
+            if request.session_id:
+                lines, reused = self._incremental_ocr(request, context, regions)
+            else:
+                lines = self._run_cached(
+                    "Ocr",
+                    context,
+                    request.image.data,
+                    lambda: self.vision_client.ocr_regions(
+                        request.image.data, request.image.width, request.image.height, regions
+                    ),
+                    extra=tuple(regions),
+                )
+                lines = [(text, conf, region, None) for text, conf, region in lines]
+                reused = 0
             return assistant_pb2.OcrResult(
                 lines=[
                     assistant_pb2.OcrLine(
@@ -76,10 +183,16 @@ class VisionService(assistant_pb2_grpc.VisionServiceServicer):
                         region=assistant_pb2.Region(
                             x=region[0], y=region[1], w=region[2], h=region[3], confidence=region[4]
                         ),
+                        change=LINE_CHANGE.get(change, assistant_pb2.OcrLine.CHANGE_UNSPECIFIED),
                     )
-                    for text, conf, region in lines
-                ]
+                    for text, conf, region, change in lines
+                ],
+                reused_lines=reused,
             )
+        except Rejected as exc:
+            context.set_details(str(exc))
+            context.set_code(exc.code)
+            return assistant_pb2.OcrResult()
         except Exception as exc:
             logging.error(f"OCR failed: {exc}", exc_info=True)
             context.set_details(str(exc))
@@ -89,14 +202,11 @@ class VisionService(assistant_pb2_grpc.VisionServiceServicer):
 
 def main():
     logging.basicConfig(level=logging.INFO)
-    host = os.getenv("VISION_HOST", "127.0.0.1")
-    port = int(os.getenv("VISION_PORT", "50052"))
-    config = ServiceConfig(host=host, port=port)
-    server = serve(
+    config = ServiceConfig.from_env("VISION", default_port=50052, default_workers=12)
+    server = serve_config(
         VisionService(),
         assistant_pb2_grpc.add_VisionServiceServicer_to_server,
-        config.host,
-        config.port,
+        config,
     )
     server.wait_for_termination()
 
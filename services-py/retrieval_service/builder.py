@@ -0,0 +1,313 @@
+"""
+Incremental RAG index builder.
+
+    PYTHONPATH=services-py python3 -m retrieval_service.builder \
+        -i docs/rag/raw -o docs/rag/index -s math -g primary -t algebra --sourceId moe-math
+
+Stages: scan (content hashes) -> chunk (only new or changed documents) ->
+dedup (SimHash over every chunk) -> embed (only chunks missing from the
+previous index, across worker processes) -> write (atomic directory swap).
+
+A `<file>.meta.json` next to a document overrides the command-line metadata
+for that document (e.g. `{"sourceType": "past-paper", "topic": "fractions"}`).
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from common import utils
+
+from .chunking import chunk_stream
+from .dedup import NearDuplicateFilter, simhash
+from .engine import Embedder, get_embedder
+from .index import EmbeddingIndex, write_index
+
+
+MANIFEST_VERSION = 1
+GRADE_BANDS = ("primary", "secondary", "jc")
+EMBED_BATCH = 128
+
+
+@dataclass
+class BuildOptions:
+    input_dir: str
+    out_dir: str
+    cache_dir: str = ""
+    metadata: Dict[str, str] = field(default_factory=dict)
+    max_tokens: int = 200
+    overlap_tokens: int = 40
+    max_distance: int = 3
+    workers: int = 0
+    device_mode: bool = False
+
+
+@dataclass
+class BuildStats:
+    documents: int = 0
+    documents_rechunked: int = 0
+    documents_removed: int = 0
+    chunks: int = 0
+    duplicates_dropped: int = 0
+    embedded: int = 0
+    embeddings_reused: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+
+    def report(self) -> str:
+        lines = [
+            f"documents:          {self.documents} ({self.documents_rechunked} re-chunked, {self.documents_removed} removed)",
+            f"chunks:             {self.chunks}",
+            f"duplicates dropped: {self.duplicates_dropped}",
+            f"embeddings:         {self.embedded} computed, {self.embeddings_reused} reused",
+        ]
+        for stage, seconds in self.stage_seconds.items():
+            lines.append(f"  {stage:<8} {seconds * 1000:>10.1f} ms")
+        return "\n".join(lines)
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _chunk_document(args: Tuple[str, int, int]) -> List[dict]:
+    path, max_tokens, overlap_tokens = args
+    with open(path, "r", encoding="utf-8") as handle:
+        return [
+            {"text": text, "simhash": format(simhash(text), "016x")}
+            for text in chunk_stream(handle, max_tokens, overlap_tokens)
+        ]
+
+
+_worker_embedder: Optional[Embedder] = None
+
+
+def _init_embed_worker(device_mode: bool) -> None:
+    global _worker_embedder
+    _worker_embedder = get_embedder(device_mode)
+
+
+def _embed_batch(texts: List[str]) -> np.ndarray:
+    return _worker_embedder.embed(texts).astype(np.float16)
+
+
+def _load_manifest(path: Path) -> Dict[str, dict]:
+    if not path.exists():
+        return {}
+    manifest = json.loads(path.read_text())
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("documents", {})
+
+
+def _document_metadata(path: Path, defaults: Dict[str, str]) -> Dict[str, str]:
+    meta = dict(defaults)
+    sidecar = path.with_name(path.name + ".meta.json")
+    if sidecar.exists():
+        meta.update(json.loads(sidecar.read_text()))
+    return meta
+
+
+def _previous_vectors(out_dir: str, model: str) -> Dict[str, np.ndarray]:
+    try:
+        index = EmbeddingIndex(out_dir)
+    except FileNotFoundError:
+        return {}
+    if index.model != model:
+        return {}
+    # Copy rows out of the mapping so the old files can be replaced safely.
+    return {_text_key(index.record(row)["content"]): np.array(index.embeddings[row]) for row in range(index.count)}
+
+
+def _swap_in(tmp_dir: Path, out_dir: Path) -> None:
+    old_dir = out_dir.with_name(out_dir.name + ".old")
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+    if out_dir.exists():
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    # Running services keep their mappings of the unlinked files.
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def build(options: BuildOptions) -> BuildStats:
+    stats = BuildStats()
+    input_dir = Path(options.input_dir)
+    out_dir = Path(options.out_dir)
+    cache_dir = Path(options.cache_dir or f"{options.out_dir}.cache")
+    chunk_cache = cache_dir / "chunks"
+    chunk_cache.mkdir(parents=True, exist_ok=True)
+    workers = options.workers or min(4, os.cpu_count() or 1)
+    embedder = get_embedder(options.device_mode)
+    params = {
+        "max_tokens": options.max_tokens,
+        "overlap_tokens": options.overlap_tokens,
+    }
+    # Chunk caches are keyed by document hash and chunking parameters.
+    params_key = _text_key(json.dumps(params, sort_keys=True))[:8]
+
+    def cache_path(rel: str) -> Path:
+        return chunk_cache / f"{hashes[rel]}-{params_key}.json"
+
+    def timed(stage: str, start: float) -> None:
+        stats.stage_seconds[stage] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    files = sorted(p for p in input_dir.rglob("*.txt") if p.is_file())
+    hashes = {str(p.relative_to(input_dir)): _file_hash(p) for p in files}
+    previous = _load_manifest(cache_dir / "manifest.json")
+    stats.documents = len(files)
+    stats.documents_removed = len(set(previous) - set(hashes))
+    timed("scan", start)
+
+    start = time.perf_counter()
+    stale = [p for p in files if not cache_path(str(p.relative_to(input_dir))).exists()]
+    if stale:
+        with ProcessPoolExecutor(max_workers=min(workers, len(stale))) as pool:
+            jobs = [(str(p), options.max_tokens, options.overlap_tokens) for p in stale]
+            for path, chunks in zip(stale, pool.map(_chunk_document, jobs)):
+                cache_path(str(path.relative_to(input_dir))).write_text(json.dumps(chunks, ensure_ascii=False))
+    stats.documents_rechunked = len(stale)
+    timed("chunk", start)
+
+    start = time.perf_counter()
+    dedup = NearDuplicateFilter(options.max_distance)
+    records: List[dict] = []
+    for path in files:
+        rel = str(path.relative_to(input_dir))
+        meta = _document_metadata(path, options.metadata)
+        source_id = meta.pop("sourceId", "") or path.stem
+        # The path below the input root keeps ids unique across subdirectories
+        # (a/intro.txt and b/intro.txt); top-level documents keep their stem.
+        doc_key = Path(rel).with_suffix("").as_posix()
+        chunks = json.loads(cache_path(rel).read_text())
+        for position, chunk in enumerate(chunks):
+            stats.chunks += 1
+            duplicate, _ = dedup.check_and_add(int(chunk["simhash"], 16))
+            if duplicate:
+                stats.duplicates_dropped += 1
+                continue
+            records.append(
+                {
+                    "id": f"{source_id}-{doc_key}-{position}",
+                    "gradeBand": meta.get("gradeBand", ""),
+                    "subject": meta.get("subject", ""),
+                    "topic": meta.get("topic", ""),
+                    "content": chunk["text"],
+                    "sourceType": meta.get("sourceType", ""),
+                    "tags": meta.get("tags", []),
+                    "source": meta.get("source", rel),
+                }
+            )
+    timed("dedup", start)
+
+    start = time.perf_counter()
+    cached = _previous_vectors(str(out_dir), embedder.model_name)
+    dim = next(iter(cached.values())).shape[0] if cached else embedder.embed(["dim probe"]).shape[1]
+    embeddings = np.zeros((len(records), dim), dtype=np.float16)
+    missing: List[int] = []
+    for row, record in enumerate(records):
+        vector = cached.get(_text_key(record["content"]))
+        if vector is None:
+            missing.append(row)
+        else:
+            embeddings[row] = vector
+    stats.embeddings_reused = len(records) - len(missing)
+    batches = [missing[i : i + EMBED_BATCH] for i in range(0, len(missing), EMBED_BATCH)]
+    if len(batches) > 1 and workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_embed_worker, initargs=(options.device_mode,)
+        ) as pool:
+            vectors = pool.map(_embed_batch, [[records[row]["content"] for row in batch] for batch in batches])
+            for batch, batch_vectors in zip(batches, vectors):
+                embeddings[batch] = batch_vectors
+    else:
+        for batch in batches:
+            embeddings[batch] = embedder.embed([records[row]["content"] for row in batch])
+    stats.embedded = len(missing)
+    cached.clear()
+    timed("embed", start)
+
+    start = time.perf_counter()
+    tmp_dir = out_dir.with_name(f"{out_dir.name}.tmp-{os.getpid()}")
+    write_index(str(tmp_dir), records, embeddings, embedder.model_name)
+    _swap_in(tmp_dir, out_dir)
+    live = {cache_path(rel).stem for rel in hashes}
+    for cache_file in chunk_cache.glob("*.json"):
+        if cache_file.stem not in live:
+            cache_file.unlink()
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "params": params,
+        "documents": {rel: {"hash": doc_hash} for rel, doc_hash in hashes.items()},
+    }
+    (cache_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    timed("write", start)
+
+    (cache_dir / "build_stats.json").write_text(json.dumps(asdict(stats), indent=2))
+    return stats
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Build or update a memory-mapped RAG index from .txt files")
+    parser.add_argument("-i", "--inputDir", required=True, help="directory containing .txt files (searched recursively)")
+    parser.add_argument("-o", "--outDir", required=True, help="index directory to write")
+    parser.add_argument("-s", "--subject", default="")
+    parser.add_argument("-g", "--gradeBand", default="", choices=("",) + GRADE_BANDS)
+    parser.add_argument("-t", "--topic", default="")
+    parser.add_argument("--sourceId", default="")
+    parser.add_argument("--sourceType", default="syllabus")
+    parser.add_argument("--cacheDir", default="", help="manifest and chunk cache (default: <outDir>.cache)")
+    parser.add_argument("--maxTokens", type=int, default=200)
+    parser.add_argument("--overlapTokens", type=int, default=40)
+    parser.add_argument("--maxDistance", type=int, default=3, help="SimHash Hamming distance treated as duplicate")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: min(4, cpu count))")
+    args = parser.parse_args(argv)
+
+    metadata = {
+        key: value
+        for key, value in {
+            "subject": args.subject,
+            "gradeBand": args.gradeBand,
+            "topic": args.topic,
+            "sourceId": args.sourceId,
+            "sourceType": args.sourceType,
+        }.items()
+        if value
+    }
+    stats = build(
+        BuildOptions(
+            input_dir=args.inputDir,
+            out_dir=args.outDir,
+            cache_dir=args.cacheDir,
+            metadata=metadata,
+            max_tokens=args.maxTokens,
+            overlap_tokens=args.overlapTokens,
+            max_distance=args.maxDistance,
+            workers=args.workers,
+            device_mode=utils.is_device_mode(),
+        )
+    )
+    print(stats.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Streaming, token-aware chunking for RAG documents.
+
+Token counts approximate a WordPiece tokenizer: each word, number or
+punctuation mark is one token and each CJK character is one token. That is
+close enough to keep windows under MiniLM's 256-token limit without loading
+a tokenizer in every build worker.
+"""
+import re
+from typing import Iterable, Iterator, List, Tuple
+
+
+_CJK = r"\u3000-\u303f\u3400-\u9fff\uf900-\ufaff\uff00-\uffef"
+_PIECE_RE = re.compile(rf"[{_CJK}]|[^\s{_CJK}]+")
+_SUBTOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_CJK_RE = re.compile(rf"[{_CJK}]")
+
+Piece = Tuple[str, int]
+
+
+def _pieces(text: str, max_tokens: int = 0) -> List[Piece]:
+    """
+    Splits text into whitespace-free pieces with their token counts. With
+    `max_tokens`, pieces longer than that (long formulas, URLs, table rows
+    without spaces) are cut at token boundaries so no piece overflows a window.
+    """
+    out: List[Piece] = []
+    for piece in _PIECE_RE.findall(text):
+        tokens = list(_SUBTOKEN_RE.finditer(piece))
+        if max_tokens <= 0 or len(tokens) <= max_tokens:
+            out.append((piece, max(1, len(tokens))))
+            continue
+        start = 0
+        for first in range(max_tokens, len(tokens), max_tokens):
+            cut = tokens[first].start()
+            out.append((piece[start:cut], max_tokens))
+            start = cut
+        out.append((piece[start:], len(tokens) - (len(tokens) - 1) // max_tokens * max_tokens))
+    return out
+
+
+def _join(pieces: List[Piece]) -> str:
+    parts: List[str] = []
+    prev_cjk = True
+    for piece, _ in pieces:
+        cjk = bool(_CJK_RE.match(piece))
+        if parts and not (cjk and prev_cjk):
+            parts.append(" ")
+        parts.append(piece)
+        prev_cjk = cjk
+    return "".join(parts)
+
+
+def paragraphs(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Yields blank-line separated paragraphs without reading the whole file.
+    """
+    buffer: List[str] = []
+    for line in lines:
+        if line.strip():
+            buffer.append(line.strip())
+        elif buffer:
+            yield " ".join(buffer)
+            buffer = []
+    if buffer:
+        yield " ".join(buffer)
+
+
+def chunk_stream(
+    lines: Iterable[str], max_tokens: int = 200, overlap_tokens: int = 40, min_tokens: int = 8
+) -> Iterator[str]:
+    """
+    Packs paragraphs into windows of at most `max_tokens`, carrying the last
+    `overlap_tokens` of each window into the next. Paragraphs longer than a
+    window are split mid-paragraph, and single pieces longer than a window are
+    cut at token boundaries. Trailing windows under `min_tokens` that would
+    only repeat the overlap are dropped.
+    """
+    if overlap_tokens >= max_tokens:
+        raise ValueError("overlap_tokens must be smaller than max_tokens")
+    window: List[Piece] = []
+    size = 0
+    fresh = 0
+
+    def overlap_tail() -> Tuple[List[Piece], int]:
+        tail: List[Piece] = []
+        total = 0
+        for piece in reversed(window):
+            if total + piece[1] > overlap_tokens:
+                break
+            tail.append(piece)
+            total += piece[1]
+        tail.reverse()
+        return tail, total
+
+    for paragraph in paragraphs(lines):
+        for piece in _pieces(paragraph, max_tokens):
+            if size + piece[1] > max_tokens and window:
+                yield _join(window)
+                window, size = overlap_tail()
+                fresh = 0
+                # Give up overlap rather than exceed the window with a long piece.
+                while window and size + piece[1] > max_tokens:
+                    size -= window.pop(0)[1]
+            window.append(piece)
+            size += piece[1]
+            fresh += piece[1]
+        # Prefer closing windows on paragraph boundaries once they are mostly full.
+        if size >= max_tokens * 0.75:
+            yield _join(window)
+            window, size = overlap_tail()
+            fresh = 0
+    if window and fresh >= min_tokens:
+        yield _join(window)
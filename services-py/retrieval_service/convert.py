@@ -0,0 +1,47 @@
+"""
+Builds a memory-mapped RAG index from a JSON array of RagChunk objects
+(e.g. docs/rag/moe_samples.json):
+
+    PYTHONPATH=services-py python3 -m retrieval_service.convert \
+        --json docs/rag/moe_samples.json --out docs/rag/index
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from common import utils
+
+from .engine import get_embedder
+from .index import write_index
+
+
+def convert(json_path: str, out_path: str, device_mode: bool, batch_size: int = 256) -> int:
+    records = json.loads(Path(json_path).read_text(encoding="utf-8"))
+    embedder = get_embedder(device_mode)
+    dim = embedder.embed(["dim probe"]).shape[1]
+    embeddings = np.zeros((len(records), dim), dtype=np.float32)
+    for start in range(0, len(records), batch_size):
+        batch = records[start : start + batch_size]
+        embeddings[start : start + len(batch)] = embedder.embed([r["content"] for r in batch])
+    write_index(out_path, records, embeddings, embedder.model_name)
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a JSON RAG index into the mmap index format")
+    parser.add_argument("--json", required=True, help="input JSON array of RagChunk objects")
+    parser.add_argument("--out", required=True, help="output index directory")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    count = convert(args.json, args.out, utils.is_device_mode())
+    print(f"Wrote {count} chunks to {args.out} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
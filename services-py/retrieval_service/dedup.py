@@ -0,0 +1,63 @@
+"""
+Near-duplicate detection with 64-bit SimHash over word shingles.
+
+Candidates are found by splitting each fingerprint into bands: two
+fingerprints within `max_distance` bits must agree exactly on at least one
+of `max_distance + 1` bands, so only same-band buckets are compared.
+"""
+import hashlib
+import re
+from typing import Dict, List, Tuple
+
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_MASK64 = (1 << 64) - 1
+
+
+def simhash(text: str, shingle: int = 3) -> int:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle:
+        features = words or [text]
+    else:
+        features = [" ".join(words[i : i + shingle]) for i in range(len(words) - shingle + 1)]
+    weights = [0] * 64
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint & _MASK64
+
+
+class NearDuplicateFilter:
+    """
+    Keeps the first occurrence of each near-duplicate group. Feed chunks in a
+    stable order so incremental builds drop the same chunks every time.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self._bands = max_distance + 1
+        self._band_bits = 64 // self._bands
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(self._bands)]
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        mask = (1 << self._band_bits) - 1
+        return [(fingerprint >> (band * self._band_bits)) & mask for band in range(self._bands)]
+
+    def check_and_add(self, fingerprint: int) -> Tuple[bool, int]:
+        """
+        Returns (is_duplicate, fingerprint_of_match_or_self). Non-duplicates
+        are added to the index.
+        """
+        keys = self._band_keys(fingerprint)
+        for band, key in enumerate(keys):
+            for seen in self._buckets[band].get(key, ()):
+                if bin(seen ^ fingerprint).count("1") <= self.max_distance:
+                    return True, seen
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(fingerprint)
+        return False, fingerprint
@@ -0,0 +1,118 @@
+from abc import ABC, abstractmethod
+import hashlib
+import os
+import re
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .index import SCORE_BLOCK_ROWS, EmbeddingIndex
+
+
+MINILM_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+MOCK_MODEL = "mock-hash-384"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class Embedder(ABC):
+    model_name: str = ""
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embeds a batch of texts.
+
+        Returns:
+            A float32 array of shape (len(texts), dim) with L2-normalized rows.
+        """
+        pass
+
+
+class MockEmbedder(Embedder):
+    """
+    A dependency-free embedder for development: hashes word unigrams and
+    bigrams into a fixed number of buckets. Similar wording scores high, which
+    is enough to exercise filtering and ranking without downloading a model.
+    """
+    model_name = MOCK_MODEL
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN_RE.findall(text.lower())
+            for feature in tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]:
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                out[row, int.from_bytes(digest, "little") % self.dim] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+
+class SdkEmbedder(Embedder):
+    """
+    MiniLM sentence embeddings, matching the model the orchestrator used.
+    """
+
+    def __init__(self, model_name: str = ""):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except Exception as exc:
+            raise RuntimeError("sentence-transformers not available") from exc
+        self.model_name = model_name or os.getenv("RETRIEVAL_EMBED_MODEL", MINILM_MODEL)
+        self._model = SentenceTransformer(self.model_name, device="cpu")
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(
+            list(texts), batch_size=32, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def get_embedder(device_mode: bool) -> Embedder:
+    """
+    Factory function to get the appropriate embedder based on the
+    `DEVICE_MODE` environment variable.
+    """
+    if device_mode:
+        return SdkEmbedder()
+    return MockEmbedder()
+
+
+class Retriever:
+    """
+    Filters by metadata postings, embeds all queries in one batch and returns
+    the top-scoring chunks per query.
+    """
+
+    def __init__(self, index: EmbeddingIndex, embedder: Embedder):
+        if index.model != embedder.model_name:
+            raise RuntimeError(
+                f"RAG index at {index.path} was built with {index.model}, "
+                f"but the service embeds queries with {embedder.model_name}"
+            )
+        self.index = index
+        self.embedder = embedder
+
+    def retrieve(
+        self,
+        queries: Sequence[str],
+        grade_band: str,
+        subjects: Sequence[str],
+        source_types: Sequence[str],
+        limit: int,
+        block_rows: int = SCORE_BLOCK_ROWS,
+    ) -> List[List[Tuple[dict, float]]]:
+        if not queries:
+            return []
+        rows = self.index.candidates(grade_band, subjects, source_types)
+        if rows is not None and rows.size == 0:
+            return [[] for _ in queries]
+        vectors = self.embedder.embed(queries)
+        hits = self.index.search(vectors, limit, rows, block_rows)
+        return [[(self.index.record(row), score) for row, score in query_hits] for query_hits in hits]
+
+
+def get_retriever(device_mode: bool, index_path: str) -> Retriever:
+    return Retriever(EmbeddingIndex(index_path), get_embedder(device_mode))
@@ -0,0 +1,163 @@
+"""
+On-disk RAG index: a float16 embedding matrix plus metadata, laid out so the
+service can memory-map it and start without parsing or re-embedding anything.
+
+Directory layout:
+    header.json      version, row count, dim, embedding model, posting offsets
+    embeddings.f16   row-major float16 matrix, count x dim, L2-normalized
+    postings.u32     sorted row ids per (column, value), sliced via header offsets
+    records.off      uint64 offsets into records.bin, count + 1 entries
+    records.bin      one UTF-8 JSON object per row (RagChunk fields)
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+INDEX_VERSION = 1
+# Metadata columns with precomputed posting lists, keyed by RagChunk field name.
+FILTER_COLUMNS = ("gradeBand", "subject", "sourceType")
+# Rows are scored in blocks so float16 -> float32 conversion stays bounded.
+SCORE_BLOCK_ROWS = 32768
+
+
+def write_index(path: str, records: Sequence[dict], embeddings: np.ndarray, model: str) -> None:
+    if embeddings.ndim != 2 or embeddings.shape[0] != len(records):
+        raise ValueError(f"Expected {len(records)} embedding rows, got shape {embeddings.shape}")
+    out = Path(path)
+    out.mkdir(parents=True, exist_ok=True)
+
+    np.ascontiguousarray(embeddings, dtype=np.float16).tofile(out / "embeddings.f16")
+
+    postings: Dict[str, Dict[str, List[int]]] = {column: {} for column in FILTER_COLUMNS}
+    for row, record in enumerate(records):
+        for column in FILTER_COLUMNS:
+            postings[column].setdefault(str(record.get(column) or ""), []).append(row)
+    offsets: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    flat: List[int] = []
+    for column, values in postings.items():
+        offsets[column] = {}
+        for value, rows in sorted(values.items()):
+            offsets[column][value] = (len(flat), len(rows))
+            flat.extend(rows)
+    np.asarray(flat, dtype=np.uint32).tofile(out / "postings.u32")
+
+    record_offsets = [0]
+    with open(out / "records.bin", "wb") as handle:
+        for record in records:
+            blob = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            handle.write(blob)
+            record_offsets.append(record_offsets[-1] + len(blob))
+    np.asarray(record_offsets, dtype=np.uint64).tofile(out / "records.off")
+
+    header = {
+        "version": INDEX_VERSION,
+        "count": len(records),
+        "dim": int(embeddings.shape[1]),
+        "model": model,
+        "postings": offsets,
+    }
+    # Header goes last so a half-written index is never picked up as valid.
+    tmp = out / "header.json.tmp"
+    tmp.write_text(json.dumps(header, indent=2))
+    os.replace(tmp, out / "header.json")
+
+
+def _mmap(path: Path, dtype, shape=None) -> np.ndarray:
+    if path.stat().st_size == 0:
+        return np.zeros(shape or (0,), dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+class EmbeddingIndex:
+    """
+    Read-only view over an index directory. Opening it only maps files, so
+    startup cost does not grow with corpus size.
+    """
+
+    def __init__(self, path: str):
+        root = Path(path)
+        header_path = root / "header.json"
+        if not header_path.exists():
+            raise FileNotFoundError(
+                f"RAG index not found at {root}. Build one with `python3 -m retrieval_service.convert`."
+            )
+        header = json.loads(header_path.read_text())
+        if header.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported RAG index version {header.get('version')} at {root}")
+        self.path = str(root)
+        self.count = int(header["count"])
+        self.dim = int(header["dim"])
+        self.model = header["model"]
+        self._posting_offsets = header["postings"]
+        self.embeddings = _mmap(root / "embeddings.f16", np.float16, (self.count, self.dim))
+        self._postings = _mmap(root / "postings.u32", np.uint32)
+        self._record_offsets = _mmap(root / "records.off", np.uint64)
+        self._records = _mmap(root / "records.bin", np.uint8)
+
+    def posting(self, column: str, value: str) -> np.ndarray:
+        offset, length = self._posting_offsets.get(column, {}).get(value, (0, 0))
+        return self._postings[offset : offset + length]
+
+    def candidates(
+        self,
+        grade_band: str = "",
+        subjects: Iterable[str] = (),
+        source_types: Iterable[str] = (),
+    ) -> Optional[np.ndarray]:
+        """
+        Returns sorted row ids matching every given filter, or None when no
+        filter applies. Values within one column are OR-ed.
+        """
+        selected: Optional[np.ndarray] = None
+        for column, values in (
+            ("gradeBand", [grade_band] if grade_band else []),
+            ("subject", list(subjects)),
+            ("sourceType", list(source_types)),
+        ):
+            if not values:
+                continue
+            lists = [self.posting(column, value) for value in values]
+            rows = lists[0] if len(lists) == 1 else np.unique(np.concatenate(lists))
+            selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+            if selected.size == 0:
+                break
+        return selected
+
+    def search(
+        self,
+        queries: np.ndarray,
+        limit: int,
+        rows: Optional[np.ndarray] = None,
+        block_rows: int = SCORE_BLOCK_ROWS,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Scores a batch of normalized query vectors (Q x dim) against the
+        candidate rows and returns the top `limit` (row, score) pairs per query.
+        """
+        total = self.count if rows is None else int(rows.size)
+        if total == 0 or limit <= 0:
+            return [[] for _ in range(len(queries))]
+        queries = np.asarray(queries, dtype=np.float32)
+        scores = np.empty((queries.shape[0], total), dtype=np.float32)
+        for start in range(0, total, block_rows):
+            end = min(total, start + block_rows)
+            block = self.embeddings[start:end] if rows is None else self.embeddings[rows[start:end]]
+            scores[:, start:end] = queries @ block.astype(np.float32).T
+
+        k = min(limit, total)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for q in range(queries.shape[0]):
+            order = top[q][np.argsort(-scores[q, top[q]])]
+            ids = order if rows is None else rows[order]
+            results.append([(int(row), float(scores[q, col])) for row, col in zip(ids, order)])
+        return results
+
+    def record(self, row: int) -> dict:
+        start = int(self._record_offsets[row])
+        end = int(self._record_offsets[row + 1])
+        return json.loads(self._records[start:end].tobytes().decode("utf-8"))
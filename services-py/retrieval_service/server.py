@@ -0,0 +1,106 @@
+import logging
+import os
+import sys
+from pathlib import Path
+
+import grpc
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "common" / "gen"))
+
+from common import utils
+from common.admission import AdmissionController, MethodLimits, Rejected
+from common.grpc_server import serve_config
+from common.models import ServiceConfig
+from common.pressure import get_monitor
+
+import assistant_pb2
+import assistant_pb2_grpc
+
+from .engine import get_retriever
+
+
+DEFAULT_INDEX_PATH = str(Path(__file__).resolve().parents[2] / "docs" / "rag" / "index")
+
+# Defaults for admission control; override with RETRIEVAL_<METHOD>_CONCURRENCY/_QUEUE.
+# Running plus queued stays below RETRIEVAL_MAX_WORKERS so Health always gets a thread.
+ADMISSION_LIMITS = {
+    "Retrieve": MethodLimits(max_concurrency=2, max_queue=4),
+}
+
+# Scoring block size per pressure level (NORMAL, ELEVATED, HIGH, CRITICAL); smaller
+# blocks bound the float32 working set and hold the CPU for shorter stretches.
+PRESSURE_SCORE_BLOCK_ROWS = (32768, 32768, 8192, 4096)
+
+
+class RetrievalService(assistant_pb2_grpc.RetrievalServiceServicer):
+    def __init__(self, index_path: str = DEFAULT_INDEX_PATH):
+        self.retriever = get_retriever(utils.is_device_mode(), index_path)
+        self.admission = AdmissionController.from_env("RETRIEVAL", ADMISSION_LIMITS)
+        self.pressure = get_monitor()
+        logging.info(
+            f"Initialized RetrievalService with {self.retriever.index.count} chunks "
+            f"from {index_path} using {self.retriever.embedder.__class__.__name__}"
+        )
+
+    def Health(self, request, context):
+        return assistant_pb2.HealthResponse(
+            ok=True, message=f"ok admission: {self.admission.summary()} pressure: {self.pressure.summary()}"
+        )
+
+    def Retrieve(self, request, context):
+        try:
+            with self.admission.admit("Retrieve", context):
+                results = self.retriever.retrieve(
+                    list(request.queries),
+                    request.grade_band,
+                    list(request.subjects),
+                    list(request.source_types),
+                    request.limit or 3,
+                    block_rows=self.pressure.pick(PRESSURE_SCORE_BLOCK_ROWS),
+                )
+            return assistant_pb2.RetrieveResponse(
+                results=[
+                    assistant_pb2.RetrieveResult(
+                        chunks=[
+                            assistant_pb2.RagChunk(
+                                id=record.get("id", ""),
+                                grade_band=record.get("gradeBand", ""),
+                                subject=record.get("subject", ""),
+                                topic=record.get("topic", ""),
+                                content=record.get("content", ""),
+                                source_type=record.get("sourceType") or "",
+                                tags=record.get("tags") or [],
+                                source=(record.get("source") or "") if request.include_sources else "",
+                                score=score,
+                            )
+                            for record, score in hits
+                        ]
+                    )
+                    for hits in results
+                ]
+            )
+        except Rejected as exc:
+            context.set_details(str(exc))
+            context.set_code(exc.code)
+            return assistant_pb2.RetrieveResponse()
+        except Exception as exc:
+            logging.error(f"Retrieve failed: {exc}", exc_info=True)
+            context.set_details(str(exc))
+            context.set_code(grpc.StatusCode.INTERNAL)
+            return assistant_pb2.RetrieveResponse()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    config = ServiceConfig.from_env("RETRIEVAL", default_port=50055, default_workers=8)
+    server = serve_config(
+        RetrievalService(os.getenv("RETRIEVAL_INDEX_PATH", DEFAULT_INDEX_PATH)),
+        assistant_pb2_grpc.add_RetrievalServiceServicer_to_server,
+        config,
+    )
+    server.wait_for_termination()
+
+
+if __name__ == "__main__":
+    main()
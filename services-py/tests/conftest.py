@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+# Generated stubs live in common/gen after `make proto`; PYTHONPATH may add others.
+sys.path.append(str(ROOT / "common" / "gen"))
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import grpc
+import pytest
+
+from common.admission import AdmissionController, MethodLimiter, MethodLimits, Rejected
+
+
+class FakeContext:
+    def __init__(self, remaining=None, active=True):
+        self.remaining = remaining
+        self.active = active
+
+    def time_remaining(self):
+        return self.remaining
+
+    def is_active(self):
+        return self.active
+
+
+def _hold(controller, method, entered, release):
+    with controller.admit(method, FakeContext()):
+        entered.set()
+        release.wait(5)
+
+
+def test_unlimited_methods_are_admitted():
+    controller = AdmissionController("test", {})
+    with controller.admit("Health", FakeContext(remaining=0.0)):
+        pass
+
+
+def test_expired_deadline_is_rejected():
+    controller = AdmissionController("test", {"Ocr": MethodLimits(1, 1)})
+    with pytest.raises(Rejected) as info:
+        with controller.admit("Ocr", FakeContext(remaining=0.0)):
+            pass
+    assert info.value.reason == "deadline_expired"
+    assert info.value.code == grpc.StatusCode.DEADLINE_EXCEEDED
+    assert controller.rejection_counts() == {"Ocr.deadline_expired": 1}
+
+
+def test_full_queue_is_shed():
+    controller = AdmissionController("test", {"Ocr": MethodLimits(max_concurrency=1, max_queue=0)})
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(controller, "Ocr", entered, release))
+    holder.start()
+    try:
+        assert entered.wait(5)
+        with pytest.raises(Rejected) as info:
+            with controller.admit("Ocr", FakeContext()):
+                pass
+        assert info.value.reason == "queue_full"
+        assert info.value.code == grpc.StatusCode.RESOURCE_EXHAUSTED
+    finally:
+        release.set()
+        holder.join()
+    assert controller.summary() == "rejected=1 Ocr.queue_full=1"
+
+
+def test_wait_longer_than_deadline_is_rejected_up_front():
+    limiter = MethodLimiter("Ocr", MethodLimits(max_concurrency=1, max_queue=4))
+    limiter.acquire(FakeContext())
+    limiter.release(0.5)
+    limiter.acquire(FakeContext())
+    try:
+        with pytest.raises(Rejected) as info:
+            limiter.acquire(FakeContext(remaining=0.1))
+        assert info.value.reason == "deadline_too_short"
+    finally:
+        limiter.release(0.5)
+
+
+def test_queued_request_runs_when_slot_frees():
+    controller = AdmissionController("test", {"Ocr": MethodLimits(max_concurrency=1, max_queue=1)})
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(controller, "Ocr", entered, release))
+    holder.start()
+    assert entered.wait(5)
+    threading.Timer(0.1, release.set).start()
+    started = time.monotonic()
+    with controller.admit("Ocr", FakeContext(remaining=5.0)):
+        waited = time.monotonic() - started
+    holder.join()
+    assert waited >= 0.05
+    assert controller.rejection_counts() == {}
+
+
+def test_queued_request_is_dropped_when_client_leaves():
+    controller = AdmissionController("test", {"Ocr": MethodLimits(max_concurrency=1, max_queue=1)})
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=_hold, args=(controller, "Ocr", entered, release))
+    holder.start()
+    try:
+        assert entered.wait(5)
+        with pytest.raises(Rejected) as info:
+            with controller.admit("Ocr", FakeContext(active=False)):
+                pass
+        assert info.value.code == grpc.StatusCode.CANCELLED
+    finally:
+        release.set()
+        holder.join()
+
+
+def test_env_overrides_and_capacity(monkeypatch):
+    monkeypatch.setenv("VISION_DETECT_TEXT_REGIONS_QUEUE", "4")
+    controller = AdmissionController.from_env(
+        "VISION", {"DetectTextRegions": MethodLimits(1, 2), "Ocr": MethodLimits(1, 2)}
+    )
+    assert controller.service == "vision"
+    assert controller.capacity() == (1 + 4) + (1 + 2)
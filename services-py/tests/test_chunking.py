@@ -0,0 +1,79 @@
+import pytest
+
+from retrieval_service.chunking import _SUBTOKEN_RE, _pieces, chunk_stream, paragraphs
+from retrieval_service.dedup import NearDuplicateFilter, simhash
+
+
+def _tokens(text):
+    return len(_SUBTOKEN_RE.findall(text))
+
+
+def _words(count, start=0):
+    return " ".join(f"w{i}" for i in range(start, start + count))
+
+
+def test_paragraphs_split_on_blank_lines():
+    lines = ["first line\n", "  continues  \n", "\n", "\n", "second\n"]
+    assert list(paragraphs(lines)) == ["first line continues", "second"]
+
+
+def test_windows_stay_under_max_and_overlap():
+    chunks = list(chunk_stream([_words(500)], max_tokens=100, overlap_tokens=20))
+    assert len(chunks) > 1
+    assert all(_tokens(chunk) <= 100 for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[:20] == previous.split()[-20:]
+
+
+def test_short_paragraphs_are_packed_together():
+    lines = [_words(10), "", _words(10, 10), "", _words(10, 20)]
+    assert list(chunk_stream(lines, max_tokens=100, overlap_tokens=10)) == [_words(30)]
+
+
+def test_trailing_overlap_only_window_is_dropped():
+    # 80 tokens closes a window at the paragraph boundary; the 3-token tail is
+    # mostly overlap and under min_tokens.
+    chunks = list(chunk_stream([_words(80), "", "a b c"], max_tokens=100, overlap_tokens=20, min_tokens=8))
+    assert chunks == [_words(80)]
+
+
+def test_cjk_is_one_token_per_character_and_joined_without_spaces():
+    text = "勾股定理" * 30
+    chunks = list(chunk_stream([text], max_tokens=50, overlap_tokens=10))
+    assert all(" " not in chunk and len(chunk) <= 50 for chunk in chunks)
+    assert chunks[0] == text[:50]
+
+
+def test_piece_longer_than_window_is_hard_split():
+    row = ",".join(f"c{i}" for i in range(300))
+    pieces = _pieces(row, 200)
+    assert [count for _, count in pieces] == [200, 200, 199]
+    assert "".join(piece for piece, _ in pieces) == row
+    chunks = list(chunk_stream([_words(5) + " " + row], max_tokens=200, overlap_tokens=40))
+    assert all(_tokens(chunk) <= 200 for chunk in chunks)
+
+
+def test_overlap_must_be_smaller_than_window():
+    with pytest.raises(ValueError):
+        list(chunk_stream(["text"], max_tokens=10, overlap_tokens=10))
+
+
+def test_simhash_is_stable_and_close_for_small_edits():
+    text = " ".join(f"word{i}" for i in range(120))
+    edited = text.replace("word60", "changed")
+    other = " ".join(f"other{i}" for i in range(120))
+    assert simhash(text) == simhash(text.upper())
+    assert bin(simhash(text) ^ simhash(edited)).count("1") <= 3
+    assert bin(simhash(text) ^ simhash(other)).count("1") > 3
+
+
+def test_filter_keeps_first_of_each_near_duplicate_group():
+    dedup = NearDuplicateFilter(max_distance=3)
+    base = 0x0123_4567_89AB_CDEF
+    # One flipped bit in each of three bands leaves the fourth as the exact match.
+    near = base ^ (1 << 2) ^ (1 << 20) ^ (1 << 40)
+    far = base ^ (1 << 2) ^ (1 << 20) ^ (1 << 40) ^ (1 << 60)
+    assert dedup.check_and_add(base) == (False, base)
+    assert dedup.check_and_add(near) == (True, base)
+    assert dedup.check_and_add(far) == (False, far)
+    assert dedup.check_and_add(far) == (True, far)
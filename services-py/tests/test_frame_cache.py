@@ -0,0 +1,81 @@
+import threading
+import time
+
+from camera_service.frame_cache import FrameCache
+
+KEY = (640, 480, "jpeg")
+
+
+class FakeCamera:
+    def __init__(self, delay_s=0.0, fail=False):
+        self.delay_s = delay_s
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self, width, height, fmt):
+        self.calls += 1
+        time.sleep(self.delay_s)
+        if self.fail:
+            raise RuntimeError("sensor busy")
+        return (b"frame%d" % self.calls, "image/jpeg", width, height)
+
+
+def test_prepared_frame_is_taken_once():
+    camera = FakeCamera()
+    cache = FrameCache(camera, default_ttl_s=5.0)
+    cache.prepare(KEY)
+    time.sleep(0.1)
+    assert cache.take(KEY) == (b"frame1", "image/jpeg", 640, 480)
+    assert cache.take(KEY) is None
+    stats = cache.stats()
+    assert stats["hit"] == 1
+    assert stats["miss"] == 1
+
+
+def test_take_waits_for_in_flight_capture():
+    camera = FakeCamera(delay_s=0.2)
+    cache = FrameCache(camera, default_ttl_s=5.0)
+    cache.prepare(KEY)
+    assert cache.take(KEY)[0] == b"frame1"
+    assert camera.calls == 1
+    assert cache.stats()["hit_inflight"] == 1
+
+
+def test_repeated_prepare_reuses_pending_capture():
+    camera = FakeCamera(delay_s=0.1)
+    cache = FrameCache(camera, default_ttl_s=5.0)
+    cache.prepare(KEY)
+    cache.prepare(KEY)
+    cache.take(KEY)
+    assert camera.calls == 1
+    assert cache.stats()["prepare_reused"] == 1
+
+
+def test_other_resolution_misses():
+    cache = FrameCache(FakeCamera(), default_ttl_s=5.0)
+    cache.prepare(KEY)
+    assert cache.take((1280, 960, "jpeg")) is None
+
+
+def test_frame_expires_after_ttl():
+    cache = FrameCache(FakeCamera(), default_ttl_s=5.0)
+    cache.prepare(KEY, ttl_s=0.05)
+    time.sleep(0.2)
+    assert cache.take(KEY) is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_failed_capture_is_a_miss():
+    cache = FrameCache(FakeCamera(fail=True), default_ttl_s=5.0)
+    cache.prepare(KEY)
+    assert cache.take(KEY) is None
+    assert cache.stats()["miss_failed"] == 1
+
+
+def test_on_ready_receives_frame():
+    received = []
+    ready = threading.Event()
+    cache = FrameCache(FakeCamera(), default_ttl_s=5.0)
+    cache.prepare(KEY, on_ready=lambda frame: (received.append(frame), ready.set()))
+    assert ready.wait(5)
+    assert received[0][0] == b"frame1"
@@ -0,0 +1,75 @@
+import numpy as np
+
+from hailo_vision_service.postprocess import PostprocessConfig, _as_array, nms, postprocess_regions
+
+
+def _reference_nms(boxes, threshold):
+    order = sorted(range(len(boxes)), key=lambda i: -boxes[i][4])
+    keep = []
+    for i in order:
+        x1, y1, x2, y2 = boxes[i][:4]
+        ok = True
+        for j in keep:
+            a1, b1, a2, b2 = boxes[j][:4]
+            iw = max(0.0, min(x2, a2) - max(x1, a1))
+            ih = max(0.0, min(y2, b2) - max(y1, b1))
+            inter = iw * ih
+            union = (x2 - x1) * (y2 - y1) + (a2 - a1) * (b2 - b1) - inter
+            if union > 0 and inter / union > threshold:
+                ok = False
+                break
+        if ok:
+            keep.append(i)
+    return keep
+
+
+def _words(y, xs, h=20, w=60, conf=0.9):
+    return [(x, y, w, h, conf) for x in xs]
+
+
+def test_nms_keeps_most_confident_of_overlapping_boxes():
+    boxes = _as_array([(10, 10, 100, 20, 0.6), (12, 10, 100, 20, 0.9), (300, 10, 100, 20, 0.5)])
+    assert nms(boxes, 0.5).tolist() == [1, 2]
+
+
+def test_nms_matches_greedy_reference():
+    rng = np.random.default_rng(7)
+    regions = [
+        (int(x), int(y), int(w), int(h), float(c))
+        for x, y, w, h, c in zip(
+            rng.integers(0, 600, 300),
+            rng.integers(0, 400, 300),
+            rng.integers(20, 120, 300),
+            rng.integers(10, 40, 300),
+            rng.random(300),
+        )
+    ]
+    boxes = _as_array(regions)
+    assert nms(boxes, 0.4).tolist() == _reference_nms(boxes.tolist(), 0.4)
+
+
+def test_low_confidence_and_tiny_boxes_are_dropped():
+    config = PostprocessConfig(merge_level="none")
+    regions = [(10, 10, 100, 20, 0.9), (200, 10, 100, 20, 0.1), (400, 10, 4, 4, 0.9)]
+    assert [region[:4] for region in postprocess_regions(regions, config)] == [(10, 10, 100, 20)]
+
+
+def test_words_merge_into_lines_in_reading_order():
+    config = PostprocessConfig(merge_level="line")
+    regions = _words(100, [40, 110, 180]) + _words(40, [40, 110])
+    lines = postprocess_regions(regions, config)
+    assert [(x, y, w, h) for x, y, w, h, _ in lines] == [(40, 40, 130, 20), (40, 100, 200, 20)]
+
+
+def test_columns_are_read_before_rows():
+    config = PostprocessConfig(merge_level="line")
+    left = [(40, 40 + i * 30, 200, 20, 0.9) for i in range(4)]
+    right = [(500, 40 + i * 30, 200, 20, 0.9) for i in range(4)]
+    lines = postprocess_regions(right + left, config)
+    assert [(x, y) for x, y, _, _, _ in lines] == [(b[0], b[1]) for b in left + right]
+
+
+def test_cap_keeps_strongest_regions_in_order():
+    config = PostprocessConfig(merge_level="none", max_regions=2)
+    regions = [(40, 40, 200, 20, 0.9), (40, 200, 200, 20, 0.4), (40, 400, 200, 20, 0.8)]
+    assert [y for _, y, _, _, _ in postprocess_regions(regions, config)] == [40, 400]
@@ -0,0 +1,94 @@
+import pytest
+
+from common.pressure import Level, PressureMonitor, SystemReader
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _sysfs(root, temp_c=50.0, loadavg=0.4, cpus=4, cap_khz=2400000, max_khz=2400000, throttled=None):
+    """
+    Writes the files SystemReader reads under a fake PRESSURE_ROOT.
+    """
+    _write(root / "sys/class/thermal/thermal_zone0/temp", f"{int(temp_c * 1000)}\n")
+    _write(root / "sys/class/thermal/thermal_zone1/temp", "30000\n")
+    cpu = root / "sys/devices/system/cpu"
+    for index in range(cpus):
+        (cpu / f"cpu{index}").mkdir(parents=True, exist_ok=True)
+    _write(cpu / "cpu0/cpufreq/scaling_max_freq", f"{cap_khz}\n")
+    _write(cpu / "cpu0/cpufreq/cpuinfo_max_freq", f"{max_khz}\n")
+    _write(root / "proc/loadavg", f"{loadavg:.2f} 0.30 0.20 1/123 4567\n")
+    if throttled is not None:
+        _write(root / "sys/devices/platform/soc/soc:firmware/get_throttled", f"{throttled:x}\n")
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRESSURE_ROOT", str(tmp_path))
+    monkeypatch.setenv("PRESSURE_HOLD_S", "10")
+    monkeypatch.delenv("PRESSURE_LEVEL", raising=False)
+    return PressureMonitor.from_env()
+
+
+def _step(monitor, root, now, **sysfs):
+    _sysfs(root, **sysfs)
+    return monitor.update(monitor.reader.read(), now=now)
+
+
+def test_reader_parses_fake_tree(tmp_path):
+    _sysfs(tmp_path, temp_c=71.5, loadavg=2.0, cpus=4, cap_khz=1500000, max_khz=2400000, throttled=0x50004)
+    reading = SystemReader(str(tmp_path)).read()
+    assert reading.temp_c == 71.5
+    assert reading.load_per_core == 0.5
+    assert reading.freq_cap_ratio == pytest.approx(0.625)
+    assert reading.throttled is True
+
+
+def test_missing_files_leave_reading_empty(tmp_path):
+    reading = SystemReader(str(tmp_path)).read()
+    assert reading.temp_c is None and reading.freq_cap_ratio is None and reading.throttled is None
+
+
+def test_rise_is_immediate_and_step_down_waits_for_hold(monitor, tmp_path):
+    assert _step(monitor, tmp_path, 0, temp_c=50) == Level.NORMAL
+    assert _step(monitor, tmp_path, 1, temp_c=74) == Level.HIGH
+    assert _step(monitor, tmp_path, 2, temp_c=82) == Level.CRITICAL
+    # 77C is under the 80C enter threshold but inside the 5C hysteresis band.
+    assert _step(monitor, tmp_path, 3, temp_c=77) == Level.CRITICAL
+    assert _step(monitor, tmp_path, 4, temp_c=70) == Level.CRITICAL
+    assert _step(monitor, tmp_path, 13, temp_c=70) == Level.CRITICAL
+    # One step per hold period, even when the reading is far below.
+    assert _step(monitor, tmp_path, 14, temp_c=50) == Level.HIGH
+    assert _step(monitor, tmp_path, 15, temp_c=50) == Level.HIGH
+    assert _step(monitor, tmp_path, 25, temp_c=50) == Level.ELEVATED
+    assert _step(monitor, tmp_path, 26, temp_c=50) == Level.ELEVATED
+    assert _step(monitor, tmp_path, 36, temp_c=50) == Level.NORMAL
+    assert monitor.stats()["transitions"] == 5
+
+
+def test_reading_back_in_band_restarts_hold(monitor, tmp_path):
+    _step(monitor, tmp_path, 0, temp_c=82)
+    _step(monitor, tmp_path, 1, temp_c=70)
+    assert _step(monitor, tmp_path, 6, temp_c=78) == Level.CRITICAL
+    assert _step(monitor, tmp_path, 7, temp_c=70) == Level.CRITICAL
+    assert _step(monitor, tmp_path, 12, temp_c=70) == Level.CRITICAL
+    assert _step(monitor, tmp_path, 17, temp_c=70) == Level.HIGH
+
+
+def test_busy_capped_cpu_counts_as_high(monitor, tmp_path):
+    assert _step(monitor, tmp_path, 0, loadavg=2.4, cap_khz=1500000) == Level.HIGH
+
+
+def test_firmware_throttling_when_busy_counts_as_high(monitor, tmp_path):
+    assert _step(monitor, tmp_path, 0, loadavg=0.4, throttled=0x4) == Level.NORMAL
+    assert _step(monitor, tmp_path, 1, loadavg=2.4, throttled=0x4) == Level.HIGH
+
+
+def test_forced_level_ignores_readings(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRESSURE_ROOT", str(tmp_path))
+    monkeypatch.setenv("PRESSURE_LEVEL", "elevated")
+    monitor = PressureMonitor.from_env()
+    assert _step(monitor, tmp_path, 0, temp_c=85) == Level.ELEVATED
+    assert monitor.pick((640, 480, 320, 240)) == 480
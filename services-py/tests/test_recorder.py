@@ -0,0 +1,94 @@
+import io
+
+import grpc
+import pytest
+from PIL import Image
+
+assistant_pb2 = pytest.importorskip("assistant_pb2", reason="generate stubs with `make proto`")
+
+from common.recorder import CACHE_HIT_METADATA, TrafficRecorder, read_records, redact, restore
+
+
+def _jpeg(width, height):
+    out = io.BytesIO()
+    Image.new("L", (width, height), 0).save(out, "JPEG")
+    return out.getvalue()
+
+
+class FakeContext:
+    def __init__(self, trailing=None):
+        self.trailing = trailing
+
+    def time_remaining(self):
+        return 2.0
+
+    def code(self):
+        return None
+
+    def trailing_metadata(self):
+        return self.trailing
+
+
+def test_redact_then_restore_keeps_shape_of_request():
+    data = _jpeg(64, 48)
+    request = assistant_pb2.ImageWithRegions(
+        image=assistant_pb2.ImageBlob(data=data, mime="image/jpeg", width=64, height=48),
+        regions=assistant_pb2.Regions(regions=[assistant_pb2.Region(x=1, y=2, w=3, h=4)]),
+        session_id="worksheet-7",
+    )
+    copy = assistant_pb2.ImageWithRegions()
+    copy.CopyFrom(request)
+    cleared = redact(copy)
+    assert cleared == {"image.data": len(data)}
+    assert copy.image.data == b""
+    # Short ids and mime types are kept.
+    assert copy.session_id == "worksheet-7" and copy.image.mime == "image/jpeg"
+
+    restore(copy, cleared)
+    assert len(copy.image.data) == len(data)
+    assert copy.regions == request.regions
+    assert Image.open(io.BytesIO(copy.image.data)).size == (64, 48)
+
+
+def test_long_text_is_masked_to_same_length():
+    request = assistant_pb2.TtsRequest(text="The area of a circle is pi r squared.", lang="en")
+    assert redact(request) == {}
+    assert request.text == "x" * len("The area of a circle is pi r squared.")
+    assert request.lang == "en"
+
+
+def test_audio_is_restored_as_silence():
+    request = assistant_pb2.AudioBlob(pcm_s16le=b"\x01\x02" * 100, sample_rate_hz=16000, channels=1)
+    cleared = redact(request)
+    restore(request, cleared)
+    assert request.pcm_s16le == bytes(200)
+
+
+def test_recorded_frames_round_trip(tmp_path):
+    path = str(tmp_path / "vision.rec")
+    recorder = TrafficRecorder(path, redact_payloads=True)
+    request = assistant_pb2.ImageBlob(data=_jpeg(32, 32), mime="image/jpeg", width=32, height=32)
+    recorder._write(
+        "/assistant.VisionService/Ocr", request, FakeContext(), 1.0, 12.5, 2000.0, 40, 1, None, False, reused=3
+    )
+    recorder._write(
+        "/assistant.VisionService/ClassifyPage",
+        request,
+        FakeContext(trailing=(CACHE_HIT_METADATA,)),
+        2.0,
+        0.4,
+        None,
+        10,
+        1,
+        None,
+        False,
+    )
+    recorder.close()
+
+    first, second = read_records(path)
+    assert first.method.endswith("/Ocr") and first.code == grpc.StatusCode.OK.name
+    assert first.latency_ms == 12.5 and first.deadline_ms == 2000.0
+    assert first.reused == 3 and not first.cache_hit
+    assert first.redacted == {"data": len(request.data)}
+    assert assistant_pb2.ImageBlob.FromString(first.request).data == b""
+    assert second.cache_hit and second.reused == 0
@@ -0,0 +1,82 @@
+import numpy as np
+
+from tts_service.voices import VoiceRegistry, VoiceSpec, join_pieces, normalize_lang, split_runs
+
+MB = 1024 * 1024
+
+
+class FakeVoice:
+    def __init__(self, lang, rate=16000):
+        self.lang = lang
+        self.rate = rate
+        self.closed = False
+
+    def synthesize(self, text):
+        return np.full(len(text), 100, dtype="<i2").tobytes(), self.rate, 1
+
+    def close(self):
+        self.closed = True
+
+
+def _registry(langs, budget_mb, **kwargs):
+    loaded = {}
+
+    def load(spec):
+        loaded[spec.lang] = FakeVoice(spec.lang, rate=22050 if spec.lang == "en" else 16000)
+        return loaded[spec.lang]
+
+    registry = VoiceRegistry(
+        [VoiceSpec(lang, f"/models/{lang}.onnx") for lang in langs],
+        load,
+        memory_budget_bytes=budget_mb * MB,
+        footprint=lambda spec: 100 * MB,
+        **kwargs,
+    )
+    return registry, loaded
+
+
+def test_normalize_lang():
+    assert normalize_lang("zh-CN") == "zh"
+    assert normalize_lang("en_US") == "en"
+    assert normalize_lang("") == "auto"
+
+
+def test_split_runs_keeps_punctuation_with_preceding_run():
+    assert split_runs("Hello, 世界。OK") == [("en", "Hello, "), ("zh", "世界。"), ("en", "OK")]
+
+
+def test_least_recently_used_voice_is_evicted():
+    registry, loaded = _registry(["en", "zh", "fr"], budget_mb=250, pin_top=0)
+    registry.synthesize("hello", "en")
+    registry.synthesize("ni hao", "zh")
+    registry.synthesize("hello", "en")
+    registry.synthesize("bonjour", "fr")
+    assert loaded["zh"].closed and not loaded["en"].closed
+    assert registry.stats()["resident"] == "en+fr"
+    assert registry.stats()["evict"] == 1
+
+
+def test_most_used_voice_is_pinned():
+    registry, loaded = _registry(["en", "zh", "fr"], budget_mb=250, pin_top=1)
+    for _ in range(3):
+        registry.synthesize("hello", "en")
+    registry.synthesize("ni hao", "zh")
+    registry.synthesize("bonjour", "fr")
+    registry.synthesize("ni hao", "zh")
+    assert not loaded["en"].closed
+    assert registry.stats()["pinned"] == "en"
+    assert registry.stats()["load"] == 4
+
+
+def test_auto_lang_joins_runs_at_first_rate():
+    registry, _ = _registry(["en", "zh"], budget_mb=1000)
+    pcm, rate, channels = registry.synthesize("Hi 你好", "auto")
+    # "Hi " at 22050 Hz plus "你好" resampled from 16000 Hz.
+    assert (rate, channels) == (22050, 1)
+    assert len(pcm) // 2 == 3 + round(2 * 22050 / 16000)
+
+
+def test_join_pieces_resamples_to_first_rate():
+    pcm, rate, _ = join_pieces([(bytes(4), 16000, 1), (np.ones(8, dtype="<i2").tobytes(), 8000, 1)])
+    assert rate == 16000
+    assert len(pcm) // 2 == 2 + 16
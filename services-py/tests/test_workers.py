@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from common import workers
+from common.workers import WorkerCrashed, WorkerPool
+
+
+def _init(flag_path):
+    if os.path.exists(flag_path):
+        raise RuntimeError("model missing")
+    return "ready"
+
+
+def _state():
+    return workers.worker_state()
+
+
+def _crash():
+    os._exit(3)
+
+
+def test_runs_in_worker_with_initializer_state(tmp_path):
+    pool = WorkerPool("test", 1, initializer=_init, initargs=(str(tmp_path / "broken"),))
+    try:
+        assert pool.run(_state) == "ready"
+        assert pool.stats()["ok"] == 1
+    finally:
+        pool.close()
+
+
+def test_failed_respawn_drops_slot_and_fails_fast(tmp_path, monkeypatch):
+    monkeypatch.setattr(workers, "RESPAWN_BACKOFF_S", 0.0)
+    flag = tmp_path / "broken"
+    pool = WorkerPool("test", 1, initializer=_init, initargs=(str(flag),))
+    try:
+        flag.write_text("1")
+        with pytest.raises(WorkerCrashed):
+            pool.run(_crash)
+        stats = pool.stats()
+        assert stats["respawn_failed"] == 1
+        assert stats["live"] == 0
+        assert stats["degraded"] == 1
+        # No worker is left, so later calls raise instead of blocking.
+        with pytest.raises(WorkerCrashed):
+            pool.run(_state)
+        with pytest.raises(WorkerCrashed):
+            pool.run(_state)
+        assert pool.stats()["rejected"] == 2
+    finally:
+        pool.close()
+
+
+def test_crashed_worker_is_replaced(tmp_path):
+    pool = WorkerPool("test", 1, initializer=_init, initargs=(str(tmp_path / "broken"),))
+    try:
+        with pytest.raises(WorkerCrashed):
+            pool.run(_crash)
+        assert pool.run(_state) == "ready"
+        assert pool.stats()["respawned"] == 1
+        assert pool.stats()["degraded"] == 0
+    finally:
+        pool.close()
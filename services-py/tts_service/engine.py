@@ -1,12 +1,13 @@
 from abc import ABC, abstractmethod
-import math
-import shutil
-import subprocess
-import tempfile
 from typing import Tuple
-import os
 
+from common.emulator import get_emulator
 from common.utils import read_wav
+from common.workers import WorkerPool
+
+from .mock import mock_synthesize
+from .piper import PiperProcess
+from .voices import VoiceRegistry
 
 
 class TtsClient(ABC):
@@ -24,40 +25,61 @@ class TtsClient(ABC):
 class MockTtsClient(TtsClient):
     """
     A mock client that simulates TTS synthesis for development and testing.
+
+    PCM generation is pure Python, so it runs in worker processes
+    (`TTS_CPU_WORKERS`) to keep other RPCs responsive.
     """
+    def __init__(self):
+        self.workers = WorkerPool.from_env("TTS", default_workers=1)
+
     def synthesize(self, text: str, lang: str, sample_rate: int = 16000) -> Tuple[bytes, int, int]:
         print(f"Mocking TTS synthesis for text: '{text}' in language: {lang}")
-        duration = min(3.0, 0.5 + len(text) * 0.03)
-        total_samples = int(sample_rate * duration)
-        pcm = bytearray()
-        for i in range(total_samples):
-            value = int(0.2 * 32767 * math.sin(2 * math.pi * 440 * (i / sample_rate)))
-            pcm += int(value).to_bytes(2, byteorder="little", signed=True)
-        return bytes(pcm), sample_rate, 1
+        return self.workers.run(mock_synthesize, text, lang, sample_rate)
+
+
+class EmulatedTtsClient(TtsClient):
+    """
+    Silent PCM of a plausible length with Piper timing from the emulator
+    cost model, priced per character.
+    """
+    def __init__(self):
+        self.emulator = get_emulator()
+
+    def synthesize(self, text: str, lang: str, sample_rate: int = 16000) -> Tuple[bytes, int, int]:
+        self.emulator.run("tts.synthesize", len(text))
+        speech_ms = len(text) * float(self.emulator.defaults.get("tts_speech_ms_per_char", 60))
+        return bytes(2 * int(sample_rate * speech_ms / 1000.0)), sample_rate, 1
 
 
 class SdkTtsClient(TtsClient):
     """
     The client for interacting with the actual Piper TTS engine.
+
+    Voices are resident piper processes managed by a VoiceRegistry, chosen by
+    `lang` or, for "auto"/empty, per script run of the text. WAV parsing and
+    joining resampled runs go through the worker pool (`TTS_CPU_WORKERS`).
     """
+    def __init__(self):
+        self.workers = WorkerPool.from_env("TTS", default_workers=1)
+        self.voices = VoiceRegistry.from_env(
+            lambda spec: PiperProcess(spec.model_path, read=self._read_wav), workers=self.workers
+        )
+
+    def _read_wav(self, path: str) -> Tuple[bytes, int, int]:
+        return self.workers.run(read_wav, path)
+
     def synthesize(self, text: str, lang: str) -> Tuple[bytes, int, int]:
         print(f"Synthesizing speech with Piper for text: '{text}' in language: {lang}")
-        model_path = os.getenv("PIPER_MODEL_PATH", "")
-        if not model_path:
-            raise RuntimeError("PIPER_MODEL_PATH not set")
-        if not shutil.which("piper"):
-            raise RuntimeError("piper CLI not found")
-        with tempfile.NamedTemporaryFile(suffix=".wav") as handle:
-            cmd = ["piper", "--model", model_path, "--output_file", handle.name]
-            subprocess.run(cmd, input=text.encode("utf-8"), check=True)
-            return read_wav(handle.name)
+        return self.voices.synthesize(text, lang)
 
 
-def get_tts_client(device_mode: bool) -> TtsClient:
+def get_tts_client(device_mode: bool, emulator_mode: bool = False) -> TtsClient:
     """
     Factory function to get the appropriate TTS client based on the
-    `DEVICE_MODE` environment variable.
+    `DEVICE_MODE` and `EMULATOR` environment variables.
     """
     if device_mode:
         return SdkTtsClient()
+    if emulator_mode:
+        return EmulatedTtsClient()
     return MockTtsClient()
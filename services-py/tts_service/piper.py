@@ -1,11 +1,19 @@
+import logging
+import os
+import queue
 import shutil
 import subprocess
 import tempfile
-from typing import Tuple
+import threading
+from typing import Callable, Optional, Tuple
 
 from common.utils import read_wav
 
 
+# Longest wait for one utterance before the process is considered hung.
+DEFAULT_TIMEOUT_S = 30.0
+
+
 def synthesize_with_piper(text: str, model_path: str) -> Tuple[bytes, int, int]:
     if not shutil.which("piper"):
         raise RuntimeError("piper CLI not found")
@@ -13,3 +21,103 @@ def synthesize_with_piper(text: str, model_path: str) -> Tuple[bytes, int, int]:
         cmd = ["piper", "--model", model_path, "--output_file", handle.name]
         subprocess.run(cmd, input=text.encode("utf-8"), check=True)
         return read_wav(handle.name)
+
+
+class PiperProcess:
+    """
+    A long-running piper CLI with one voice model loaded.
+
+    piper reads one utterance per stdin line and, with --output_dir, writes a
+    WAV per line and prints its path, so the model is loaded once rather than
+    per request. A reader thread collects those paths; an utterance that
+    takes longer than `timeout_s` (`TTS_PIPER_TIMEOUT_S`) kills the process
+    and starts a fresh one, so a hung piper cannot hold the voice forever.
+    `read` parses each WAV (e.g. in a worker process).
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        timeout_s: Optional[float] = None,
+        read: Callable[[str], Tuple[bytes, int, int]] = read_wav,
+    ):
+        if not shutil.which("piper"):
+            raise RuntimeError("piper CLI not found")
+        if not os.path.exists(model_path):
+            raise RuntimeError(f"Piper model not found: {model_path}")
+        self.model_path = model_path
+        if timeout_s is None:
+            timeout_s = float(os.getenv("TTS_PIPER_TIMEOUT_S", str(DEFAULT_TIMEOUT_S)))
+        self.timeout_s = timeout_s
+        self._read = read
+        self._lock = threading.Lock()
+        self._output_dir = tempfile.TemporaryDirectory(prefix="piper-")
+        self._spawn()
+
+    def _spawn(self) -> None:
+        self._proc = subprocess.Popen(
+            ["piper", "--model", self.model_path, "--output_dir", self._output_dir.name],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        # Each process gets its own queue, so a killed process's late output is dropped.
+        self._lines: "queue.Queue[str]" = queue.Queue()
+        threading.Thread(
+            target=self._read_lines, args=(self._proc.stdout, self._lines), name="piper-reader", daemon=True
+        ).start()
+
+    @staticmethod
+    def _read_lines(stdout, lines: "queue.Queue[str]") -> None:
+        for output_line in stdout:
+            lines.put(output_line)
+        # EOF: wake a waiting synthesize instead of letting it run into the timeout.
+        lines.put("")
+
+    @property
+    def alive(self) -> bool:
+        return self._proc.poll() is None
+
+    def synthesize(self, text: str) -> Tuple[bytes, int, int]:
+        line = " ".join(text.split())
+        with self._lock:
+            if not self.alive:
+                raise RuntimeError(f"piper exited with code {self._proc.returncode}")
+            self._proc.stdin.write(line + "\n")
+            self._proc.stdin.flush()
+            try:
+                wav_path = self._lines.get(timeout=self.timeout_s).strip()
+            except queue.Empty:
+                logging.warning(f"piper ({self.model_path}) hung for {self.timeout_s:.0f}s; restarting it")
+                self._proc.kill()
+                self._proc.wait()
+                self._spawn()
+                raise RuntimeError(f"piper timed out after {self.timeout_s:.0f}s")
+            if not wav_path:
+                raise RuntimeError("piper produced no output")
+            try:
+                return self._read(wav_path)
+            finally:
+                os.unlink(wav_path)
+
+    def rss_bytes(self) -> Optional[int]:
+        try:
+            with open(f"/proc/{self._proc.pid}/status", "r", encoding="utf-8") as handle:
+                for status_line in handle:
+                    if status_line.startswith("VmRSS:"):
+                        return int(status_line.split()[1]) * 1024
+        except OSError:
+            pass
+        return None
+
+    def close(self) -> None:
+        if self.alive:
+            self._proc.stdin.close()
+            try:
+                self._proc.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+        self._output_dir.cleanup()
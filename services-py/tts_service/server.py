@@ -1,5 +1,4 @@
 import logging
-import os
 import sys
 from pathlib import Path
 
@@ -9,7 +8,8 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 sys.path.append(str(Path(__file__).resolve().parents[1] / "common" / "gen"))
 
 from common import utils
-from common.grpc_server import serve
+from common.admission import AdmissionController, MethodLimits, Rejected
+from common.grpc_server import serve_config
 from common.models import ServiceConfig
 
 import assistant_pb2
@@ -18,20 +18,39 @@ import assistant_pb2_grpc
 from .engine import get_tts_client
 
 
+# Defaults for admission control; override with TTS_<METHOD>_CONCURRENCY/_QUEUE.
+# Running plus queued stays below TTS_MAX_WORKERS so Health always gets a thread.
+ADMISSION_LIMITS = {
+    "Synthesize": MethodLimits(max_concurrency=2, max_queue=4),
+}
+
+
 class TtsService(assistant_pb2_grpc.TtsServiceServicer):
     def __init__(self):
-        self.tts_client = get_tts_client(utils.is_device_mode())
+        self.tts_client = get_tts_client(utils.is_device_mode(), utils.is_emulator_mode())
+        self.admission = AdmissionController.from_env("TTS", ADMISSION_LIMITS)
         logging.info(f"Initialized TtsService with client: {self.tts_client.__class__.__name__}")
 
     def Health(self, request, context):
-        return assistant_pb2.HealthResponse(ok=True, message="ok")
+        message = f"ok admission: {self.admission.summary()}"
+        for label in ("voices", "workers", "emulator"):
+            source = getattr(self.tts_client, label, None)
+            if source is not None:
+                stats = " ".join(f"{name}={value}" for name, value in sorted(source.stats().items()))
+                message += f" {label}: {stats}"
+        return assistant_pb2.HealthResponse(ok=True, message=message)
 
     def Synthesize(self, request, context):
         try:
-            pcm, sample_rate, channels = self.tts_client.synthesize(request.text, request.lang)
+            with self.admission.admit("Synthesize", context):
+                pcm, sample_rate, channels = self.tts_client.synthesize(request.text, request.lang)
             return assistant_pb2.AudioBlob(
                 pcm_s16le=pcm, sample_rate_hz=sample_rate, channels=channels
             )
+        except Rejected as exc:
+            context.set_details(str(exc))
+            context.set_code(exc.code)
+            return assistant_pb2.AudioBlob()
         except Exception as exc:
             logging.error(f"Synthesize failed: {exc}", exc_info=True)
             context.set_details(str(exc))
@@ -41,14 +60,11 @@ class TtsService(assistant_pb2_grpc.TtsServiceServicer):
 
 def main():
     logging.basicConfig(level=logging.INFO)
-    host = os.getenv("TTS_HOST", "127.0.0.1")
-    port = int(os.getenv("TTS_PORT", "50054"))
-    config = ServiceConfig(host=host, port=port)
-    server = serve(
+    config = ServiceConfig.from_env("TTS", default_port=50054, default_workers=8)
+    server = serve_config(
         TtsService(),
         assistant_pb2_grpc.add_TtsServiceServicer_to_server,
-        config.host,
-        config.port,
+        config,
     )
     server.wait_for_termination()
 
@@ -1,12 +1,23 @@
-import os
-from typing import Tuple
+import threading
+from typing import Optional, Tuple
 
-from . import piper
+from .piper import PiperProcess
+from .voices import VoiceRegistry
+
+
+_registry: Optional[VoiceRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def _get_registry() -> VoiceRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = VoiceRegistry.from_env(lambda spec: PiperProcess(spec.model_path))
+    return _registry
 
 
 def synthesize(text: str, lang: str) -> Tuple[bytes, int, int]:
-    model_path = os.getenv("PIPER_MODEL_PATH", "")
-    if not model_path:
-        raise RuntimeError("PIPER_MODEL_PATH not set")
-    # TODO: Support language-based model selection and streaming.
-    return piper.synthesize_with_piper(text, model_path)
+    # TODO: Support streaming.
+    return _get_registry().synthesize(text, lang)
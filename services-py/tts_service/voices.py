@@ -0,0 +1,299 @@
+"""
+Voice registry for multi-language synthesis.
+
+Voices are configured per language (`TTS_VOICES=en=/path/en.onnx,zh=/path/zh.onnx`,
+falling back to `PIPER_MODEL_PATH` for English). They are loaded on first
+use and stay resident until the memory budget (`TTS_VOICE_MEMORY_MB`) forces
+the least recently used unpinned voice out. Voices in `TTS_PINNED_VOICES` and
+the `TTS_PIN_TOP` most used ones are never evicted.
+
+A request with `lang` set uses that voice. With `lang` empty or "auto" the
+text is split into English and Chinese runs by script, and each run is
+synthesized with its own voice. Resampling and joining the runs can be
+handed to a WorkerPool so it stays off the gRPC threads.
+"""
+import logging
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from common.workers import WorkerPool
+
+
+AUTO = "auto"
+DEFAULT_LANG = "en"
+DEFAULT_MEMORY_MB = 600
+
+_CJK = r"\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_RE_CJK = re.compile(rf"[{_CJK}]")
+_RE_LATIN = re.compile("[A-Za-z]")
+
+
+class Voice(Protocol):
+    def synthesize(self, text: str) -> Tuple[bytes, int, int]:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+@dataclass(frozen=True)
+class VoiceSpec:
+    lang: str
+    model_path: str
+
+
+def normalize_lang(lang: str) -> str:
+    """
+    "zh-CN" -> "zh", "en_US" -> "en", "" -> "auto".
+    """
+    lang = (lang or "").strip().lower()
+    if not lang or lang == AUTO:
+        return AUTO
+    return re.split(r"[-_]", lang, maxsplit=1)[0]
+
+
+def _script(char: str) -> Optional[str]:
+    if _RE_CJK.match(char):
+        return "zh"
+    if _RE_LATIN.match(char):
+        return "en"
+    return None
+
+
+def split_runs(text: str, default_lang: str = DEFAULT_LANG) -> List[Tuple[str, str]]:
+    """
+    Splits text into [(lang, text)] runs by script. Digits, spaces and
+    punctuation (including full-width) stay with the run they follow, or
+    with the first run when leading.
+    """
+    runs: List[List[str]] = []
+    current: Optional[str] = None
+    pending = ""
+    for char in text:
+        lang = _script(char)
+        if lang is None:
+            if current is None:
+                pending += char
+            else:
+                runs[-1][1] += char
+            continue
+        if lang != current:
+            runs.append([lang, pending])
+            pending = ""
+            current = lang
+        runs[-1][1] += char
+    if not runs:
+        return [(default_lang, text)] if text.strip() else []
+    if pending:
+        runs[-1][1] += pending
+    return [(lang, run_text) for lang, run_text in runs if run_text.strip()]
+
+
+def _resample(pcm: bytes, source_rate: int, target_rate: int, channels: int) -> bytes:
+    if source_rate == target_rate or not pcm:
+        return pcm
+    samples = np.frombuffer(pcm, dtype="<i2").reshape(-1, channels).astype(np.float32)
+    count = max(1, int(round(len(samples) * target_rate / source_rate)))
+    positions = np.linspace(0, len(samples) - 1, count)
+    resampled = np.stack(
+        [np.interp(positions, np.arange(len(samples)), samples[:, ch]) for ch in range(channels)], axis=1
+    )
+    return np.clip(np.round(resampled), -32768, 32767).astype("<i2").tobytes()
+
+
+def join_pieces(pieces: Sequence[Tuple[bytes, int, int]]) -> Tuple[bytes, int, int]:
+    """
+    Concatenates per-run PCM at the first run's sample rate.
+    """
+    _, sample_rate, channels = pieces[0]
+    pcm = b"".join(_resample(piece, rate, sample_rate, channels) for piece, rate, _ in pieces)
+    return pcm, sample_rate, channels
+
+
+@dataclass
+class _Resident:
+    voice: Voice
+    footprint: int
+    in_use: int = 0
+
+
+class VoiceRegistry:
+    """
+    Lazily loads voices and keeps them resident under a memory budget.
+    """
+
+    def __init__(
+        self,
+        specs: Sequence[VoiceSpec],
+        loader: Callable[[VoiceSpec], Voice],
+        memory_budget_bytes: int = DEFAULT_MEMORY_MB * 1024 * 1024,
+        pinned: Sequence[str] = (),
+        pin_top: int = 1,
+        default_lang: str = DEFAULT_LANG,
+        footprint: Optional[Callable[[VoiceSpec], int]] = None,
+        workers: Optional[WorkerPool] = None,
+    ):
+        self.specs: Dict[str, VoiceSpec] = {spec.lang: spec for spec in specs}
+        self.default_lang = default_lang if default_lang in self.specs or not specs else specs[0].lang
+        self.memory_budget_bytes = memory_budget_bytes
+        self.pinned = set(pinned)
+        self.pin_top = pin_top
+        self._loader = loader
+        self._footprint = footprint or _default_footprint
+        self._workers = workers
+        self._lock = threading.Condition()
+        self._loading: set = set()
+        self._resident: "OrderedDict[str, _Resident]" = OrderedDict()
+        self._uses: Counter = Counter()
+        self._counts: Counter = Counter()
+
+    @classmethod
+    def from_env(cls, loader: Callable[[VoiceSpec], Voice], **kwargs) -> "VoiceRegistry":
+        specs = []
+        for entry in filter(None, (part.strip() for part in os.getenv("TTS_VOICES", "").split(","))):
+            lang, _, path = entry.partition("=")
+            specs.append(VoiceSpec(normalize_lang(lang), path.strip()))
+        fallback = os.getenv("PIPER_MODEL_PATH", "")
+        if fallback and DEFAULT_LANG not in {spec.lang for spec in specs}:
+            specs.insert(0, VoiceSpec(DEFAULT_LANG, fallback))
+        pinned = [normalize_lang(lang) for lang in os.getenv("TTS_PINNED_VOICES", "").split(",") if lang.strip()]
+        return cls(
+            specs,
+            loader,
+            memory_budget_bytes=int(os.getenv("TTS_VOICE_MEMORY_MB", str(DEFAULT_MEMORY_MB))) * 1024 * 1024,
+            pinned=pinned,
+            pin_top=int(os.getenv("TTS_PIN_TOP", "1")),
+            **kwargs,
+        )
+
+    def voice_for(self, lang: str) -> str:
+        lang = normalize_lang(lang)
+        return lang if lang in self.specs else self.default_lang
+
+    def plan(self, text: str, lang: str) -> List[Tuple[str, str]]:
+        """
+        Returns [(voice_lang, text)] in speaking order.
+        """
+        if not self.specs:
+            raise RuntimeError("No TTS voices configured (set TTS_VOICES or PIPER_MODEL_PATH)")
+        if normalize_lang(lang) != AUTO:
+            return [(self.voice_for(lang), text)]
+        runs: List[Tuple[str, str]] = []
+        for run_lang, run_text in split_runs(text, self.default_lang):
+            voice_lang = self.voice_for(run_lang)
+            if runs and runs[-1][0] == voice_lang:
+                runs[-1] = (voice_lang, runs[-1][1] + run_text)
+            else:
+                runs.append((voice_lang, run_text))
+        return runs
+
+    def synthesize(self, text: str, lang: str) -> Tuple[bytes, int, int]:
+        pieces: List[Tuple[bytes, int, int]] = []
+        for voice_lang, run_text in self.plan(text, lang):
+            pieces.append(self._synthesize_run(voice_lang, run_text))
+        if not pieces:
+            raise ValueError("Nothing to synthesize")
+        if len(pieces) == 1:
+            return pieces[0]
+        if self._workers is not None:
+            return self._workers.run(join_pieces, tuple(pieces))
+        return join_pieces(pieces)
+
+    def _synthesize_run(self, lang: str, text: str) -> Tuple[bytes, int, int]:
+        resident = self._acquire(lang)
+        try:
+            return resident.voice.synthesize(text)
+        finally:
+            # The model is only fully resident once it has synthesized something.
+            measured = getattr(resident.voice, "rss_bytes", lambda: None)()
+            with self._lock:
+                resident.in_use -= 1
+                if measured:
+                    resident.footprint = measured
+                self._lock.notify_all()
+
+    def _acquire(self, lang: str) -> _Resident:
+        with self._lock:
+            self._uses[lang] += 1
+            while True:
+                resident = self._resident.get(lang)
+                if resident is not None and getattr(resident.voice, "alive", True):
+                    self._resident.move_to_end(lang)
+                    resident.in_use += 1
+                    self._counts["hit"] += 1
+                    return resident
+                if resident is not None:
+                    # The voice process died; drop it and load again.
+                    del self._resident[lang]
+                    resident.voice.close()
+                    self._counts["died"] += 1
+                if lang not in self._loading:
+                    break
+                self._lock.wait()
+            self._loading.add(lang)
+        try:
+            spec = self.specs[lang]
+            logging.info(f"Loading TTS voice {lang} from {spec.model_path}")
+            voice = self._loader(spec)
+            resident = _Resident(voice=voice, footprint=self._footprint(spec), in_use=1)
+        finally:
+            with self._lock:
+                self._loading.discard(lang)
+                self._lock.notify_all()
+        with self._lock:
+            self._counts["load"] += 1
+            self._resident[lang] = resident
+            self._evict(keep=lang)
+        return resident
+
+    def _pinned(self) -> set:
+        top = {lang for lang, _ in self._uses.most_common(self.pin_top)} if self.pin_top > 0 else set()
+        return self.pinned | top
+
+    def _evict(self, keep: str) -> None:
+        pinned = self._pinned()
+        total = sum(resident.footprint for resident in self._resident.values())
+        for lang in list(self._resident):
+            if total <= self.memory_budget_bytes:
+                break
+            resident = self._resident[lang]
+            if lang == keep or lang in pinned or resident.in_use:
+                continue
+            del self._resident[lang]
+            total -= resident.footprint
+            self._counts["evict"] += 1
+            logging.info(f"Evicting TTS voice {lang} ({resident.footprint // (1024 * 1024)}MB)")
+            resident.voice.close()
+        if total > self.memory_budget_bytes:
+            logging.warning(
+                f"TTS voices use {total // (1024 * 1024)}MB, over the "
+                f"{self.memory_budget_bytes // (1024 * 1024)}MB budget (pinned or in use)"
+            )
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            out: Dict[str, object] = dict(self._counts)
+            out["resident"] = "+".join(self._resident) or "-"
+            out["resident_mb"] = sum(r.footprint for r in self._resident.values()) // (1024 * 1024)
+            out["pinned"] = "+".join(sorted(self._pinned() & set(self.specs))) or "-"
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            for resident in self._resident.values():
+                resident.voice.close()
+            self._resident.clear()
+
+
+def _default_footprint(spec: VoiceSpec) -> int:
+    try:
+        # ONNX runtime holds roughly twice the model file once initialized.
+        return 2 * os.path.getsize(spec.model_path)
+    except OSError:
+        return 0